@@ -1,11 +1,20 @@
 
 import random
 import time
-from typing import List, Tuple, Optional
+from typing import Dict, Generator, List, NamedTuple, Tuple, Optional, Union
+
+from board import Board, FrozenBoard, to_board, to_frozen
+from dlx import count_solutions_dlx
+from logic_solver import LogicStep, iter_logical_steps
+from solver_engine import (
+    BudgetExceeded, ConstraintState, SearchBudget, count_board, has_alternative, solve_board
+)
+from symmetry import derive
 
 # =========================================
 # =========================================
 Grid = List[List[int]]
+BoardLike = Union[Board, FrozenBoard, Grid]
 
 # =========================================
 # SudokuSolver
@@ -16,9 +25,9 @@ class SudokuSolver:
     Handles Sudoku rules, backtracking algorithm, move tracking, and timer.
     """
     def __init__(self):
-        self.initial_puzzle: Grid = []
-        self.current_grid: Grid = []
-        self.solution_grid: Grid = []
+        self.initial_puzzle: Optional[Board] = None
+        self.current_grid: Optional[Board] = None
+        self.solution_grid: Optional[Board] = None
         self.fixed_cells: List[Tuple[int, int]] = []
         self.user_move_history: List[Tuple[int, int, int]] = []
 
@@ -29,12 +38,12 @@ class SudokuSolver:
         self.moves_made_by_solver: List[Tuple[int, int, int]] = []
 
     # ---- Setup & Timer ----
-    def load_puzzle(self, puzzle: Grid, solution: Grid):
-        self.initial_puzzle = [row[:] for row in puzzle]
-        self.current_grid = [row[:] for row in puzzle]
-        self.solution_grid = [row[:] for row in solution]
+    def load_puzzle(self, puzzle: BoardLike, solution: BoardLike):
+        self.initial_puzzle = to_board(puzzle)
+        self.current_grid = self.initial_puzzle.copy()
+        self.solution_grid = to_board(solution)
         self.user_move_history = []
-        self.fixed_cells = [(r, c) for r in range(9) for c in range(9) if puzzle[r][c] != 0]
+        self.fixed_cells = [divmod(i, 9) for i, n in enumerate(self.initial_puzzle.cells) if n != 0]
         self.start_game_timer()
 
     def start_game_timer(self):
@@ -55,45 +64,37 @@ class SudokuSolver:
         return self.solve_time
 
     # ---- Core Solver Helpers ----
-    def _find_empty(self, grid: Grid) -> Optional[Tuple[int, int]]:
-        for r in range(9):
-            for c in range(9):
-                if grid[r][c] == 0:
-                    return (r, c)
-        return None
+    def _find_empty(self, grid: Board) -> Optional[Tuple[int, int]]:
+        i = grid.cells.find(0)
+        return divmod(i, 9) if i >= 0 else None
 
-    def _is_valid_placement(self, grid: Grid, row: int, col: int, num: int) -> bool:
+    def _is_valid_placement(self, grid: Board, row: int, col: int, num: int) -> bool:
         """Optimized validation - avoids list creation for better performance."""
+        cells = grid.cells
         # Check row
-        for i in range(9):
-            if grid[row][i] == num:
-                return False
+        if num in cells[row * 9:row * 9 + 9]:
+            return False
         # Check column
-        for i in range(9):
-            if grid[i][col] == num:
+        for i in range(col, 81, 9):
+            if cells[i] == num:
                 return False
         # Check 3x3 box
-        br, bc = 3 * (row // 3), 3 * (col // 3)
-        for i in range(br, br + 3):
-            for j in range(bc, bc + 3):
-                if grid[i][j] == num:
-                    return False
+        start = 27 * (row // 3) + 3 * (col // 3)
+        for i in (start, start + 9, start + 18):
+            if num in cells[i:i + 3]:
+                return False
         return True
 
-    def _solve_recursive(self, grid: Grid) -> bool:
-        spot = self._find_empty(grid)
-        if not spot:
-            return True
-        r, c = spot
-        for n in range(1, 10):
-            if self._is_valid_placement(grid, r, c, n):
-                grid[r][c] = n
-                self.moves_made_by_solver.append((r, c, n))
-                if self._solve_recursive(grid):
-                    return True
-                grid[r][c] = 0
-                self.moves_made_by_solver.append((r, c, 0))
-        return False
+    def solve_grid(self, grid: Board, record_moves: bool = False) -> bool:
+        """
+        Solve grid in place with the bitmask/MRV engine.
+        Only appends to moves_made_by_solver when record_moves is True.
+        """
+        return solve_board(grid, self.moves_made_by_solver if record_moves else None)
+
+    def _solve_recursive(self, grid: Board) -> bool:
+        """Solve grid in place, recording every placement and undo for animation."""
+        return self.solve_grid(grid, record_moves=True)
 
     # ---- User Interaction ----
     def make_user_move(self, row: int, col: int, num: int) -> bool:
@@ -103,18 +104,18 @@ class SudokuSolver:
             return False
         if num != 0:
             self.user_move_history.append((row, col, num))
-        self.current_grid[row][col] = num
+        self.current_grid[row, col] = num
         return True
 
     def clear_latest_entry(self) -> bool:
         if not self.user_move_history:
             return False
         r, c, _ = self.user_move_history.pop()
-        self.current_grid[r][c] = 0
+        self.current_grid[r, c] = 0
         return True
 
     def reset_grid(self):
-        self.current_grid = [row[:] for row in self.initial_puzzle]
+        self.current_grid = self.initial_puzzle.copy()
         self.user_move_history = []
         self.stop_game_timer()
         self.start_game_timer()
@@ -127,13 +128,28 @@ class SudokuSolver:
         """
         return self.moves_made_by_solver.copy()
 
+    def generate_logical_path(self) -> List[LogicStep]:
+        """
+        Human-style path from current_grid: one placement per empty cell,
+        each tagged with the technique that justifies it. solution_grid (if
+        set) is used for the rare guess instead of searching.
+        """
+        return list(self.iter_logical_path())
+
+    def iter_logical_path(self) -> Generator[LogicStep, None, Optional[str]]:
+        """
+        Lazy form of generate_logical_path(): steps are computed as they are
+        consumed. Returns "guess_limit" if the path stopped at MAX_GUESSES.
+        """
+        return iter_logical_steps(self.current_grid, self.solution_grid)
+
     def get_puzzle_stats(self) -> dict:
         """
         Get statistics about the current puzzle state.
         Returns: dict with filled_count, empty_count, completion_percentage, total_cells
         """
-        filled = sum(1 for r in range(9) for c in range(9) if self.current_grid[r][c] != 0)
         total = 81
+        filled = total - self.current_grid.empty_count()
         empty = total - filled
         percentage = (filled / total) * 100 if total > 0 else 0
         return {
@@ -147,7 +163,7 @@ class SudokuSolver:
         """
         Check if the puzzle is completely filled (no empty cells).
         """
-        return all(self.current_grid[r][c] != 0 for r in range(9) for c in range(9))
+        return self.current_grid.is_full()
 
     def is_puzzle_correct(self) -> bool:
         """
@@ -162,7 +178,7 @@ class SudokuSolver:
         """
         if not (0 <= row < 9 and 0 <= col < 9):
             return []
-        if self.current_grid[row][col] != 0:
+        if self.current_grid[row, col] != 0:
             return []
         
         valid_nums = []
@@ -181,13 +197,14 @@ def clear_latest_entry(solver: SudokuSolver) -> bool:
 def reset_grid(solver: SudokuSolver):
     solver.reset_grid()
 
-def auto_solve_whole(solver: SudokuSolver) -> Tuple[bool, float]:
+def auto_solve_whole(solver: SudokuSolver, record_moves: bool = False) -> Tuple[bool, float]:
     if not solver.current_grid:
         return False, 0.0
-    grid_to_solve = [row[:] for row in solver.current_grid]
-    solver.moves_made_by_solver = []
+    grid_to_solve = solver.current_grid.copy()
+    if record_moves:
+        solver.moves_made_by_solver = []
     t0 = time.time()
-    ok = solver._solve_recursive(grid_to_solve)
+    ok = solver.solve_grid(grid_to_solve, record_moves=record_moves)
     elapsed = time.time() - t0
     if ok:
         solver.current_grid = grid_to_solve
@@ -200,7 +217,7 @@ def get_hint_and_apply(solver: SudokuSolver) -> bool:
     empty_pos = solver._find_empty(solver.current_grid)
     if empty_pos:
         r, c = empty_pos
-        correct_num = solver.solution_grid[r][c]
+        correct_num = solver.solution_grid[r, c]
         solver.make_user_move(r, c, correct_num)
         return True
     return False
@@ -212,6 +229,13 @@ def generate_stepwise_path(solver: SudokuSolver) -> List[Tuple[int, int, int]]:
     """
     return solver.generate_stepwise_path()
 
+def generate_logical_path(solver: SudokuSolver) -> List[LogicStep]:
+    """
+    For animation: a short deductive path, (row, col, value, technique) per
+    placement, with no backtracking steps.
+    """
+    return solver.generate_logical_path()
+
 def get_puzzle_stats(solver: SudokuSolver) -> dict:
     """
     Get statistics about the current puzzle state.
@@ -272,13 +296,15 @@ def choose_difficulty():
             return d
         print("Please type: easy, medium, hard, or expert.")
 
+DIFFICULTIES = ["easy", "medium", "hard", "expert"]
+
 def holes_for(d):
-    # Reduced expert from 60 to 55 for faster generation
-    # 60 holes takes too long to verify uniqueness
-    return {"easy": 30, "medium": 40, "hard": 50, "expert": 55}.get(d, 40)
+    # Expert is back at 60: the carver perturbs and restarts until it hits
+    # the exact count (see carve_with_budget) instead of giving up short
+    return {"easy": 30, "medium": 40, "hard": 50, "expert": 60}.get(d, 40)
 
 # --- Board I/O ---
-def print_board(b: Grid, title: str = "Board"):
+def print_board(b: Board, title: str = "Board"):
     print(f"\n{title}:")
     for r in range(9):
         if r and r % 3 == 0:
@@ -287,122 +313,308 @@ def print_board(b: Grid, title: str = "Board"):
         for c in range(9):
             if c and c % 3 == 0:
                 row.append("|")
-            row.append(str(b[r][c]) if b[r][c] else ".")
+            row.append(str(b[r, c]) if b[r, c] else ".")
         print(" ".join(row))
     print()
 
 # --- Core Helpers for Generator ---
-def find_empty(b: Grid):
-    for r in range(9):
-        for c in range(9):
-            if b[r][c] == 0:
-                return r, c
-    return None
+def find_empty(b: Board):
+    i = b.cells.find(0)
+    return divmod(i, 9) if i >= 0 else None
 
-def valid(b: Grid, n: int, pos: Tuple[int, int]):
+def valid(b: Board, n: int, pos: Tuple[int, int]):
     r, c = pos
     for i in range(9):
-        if b[r][i] == n or b[i][c] == n:
+        if b[r, i] == n or b[i, c] == n:
             return False
     br, bc = 3 * (r // 3), 3 * (c // 3)
     for i in range(br, br + 3):
         for j in range(bc, bc + 3):
-            if b[i][j] == n:
+            if b[i, j] == n:
                 return False
     return True
 
-def solve_board_for_generation(b: Grid):
-    spot = find_empty(b)
-    if not spot:
-        return True
-    r, c = spot
-    nums = list(range(1, 10))
-    random.shuffle(nums)
-    for n in nums:
-        if valid(b, n, (r, c)):
-            b[r][c] = n
-            if solve_board_for_generation(b):
-                return True
-            b[r][c] = 0
-    return False
+def solve_board_for_generation(b: Board):
+    """Fill b in place with a random valid completion (propagation + MRV)."""
+    return solve_board(b, shuffle=random.shuffle)
+
+# --- Solution Counter (for uniqueness guarantee) ---
+def count_solutions(b: Board, limit: int = 2, budget: Optional[SearchBudget] = None) -> int:
+    """Count solutions up to `limit` with propagation + bitmask MRV search."""
+    return count_board(b, limit, budget)
 
-# --- (Simplified) Solution Counter (for uniqueness guarantee) ---
-def count_solutions(b: Grid, limit: int = 2) -> int:
-    work = [row[:] for row in b]
-    found = 0
-    def dfs():
-        nonlocal found
-        if found >= limit:
-            return
-        spot = find_empty(work)
-        if not spot:
-            found += 1
-            return
-        r, c = spot
-        for n in range(1, 10):
-            if valid(work, n, (r, c)):
-                work[r][c] = n
-                dfs()
-                work[r][c] = 0
-                if found >= limit:
-                    return
-    dfs()
-    return found
+# Uniqueness oracles selectable by make_puzzle_unique. "incremental" (the
+# default) keeps one candidate state across removals instead of recounting.
+UNIQUENESS_ORACLES = {
+    "dfs": count_solutions,
+    "dlx": count_solutions_dlx,
+}
 
 # --- Generate Full Grid ---
-def make_full_board() -> Grid:
-    b = [[0]*9 for _ in range(9)]
+def make_full_board() -> Board:
+    b = Board()
     solve_board_for_generation(b)
     return b
 
+# --- Generation Budgets ---
+class GenerationAborted(Exception):
+    """
+    Carving stopped short of its hole target. `reason` is "deadline",
+    "node_budget" or "stalled"; `puzzle`/`solution` hold the deepest
+    (still unique) puzzle reached, for callers that prefer best effort.
+    """
+    def __init__(self, reason: str, puzzle: Optional[FrozenBoard] = None,
+                 solution: Optional[FrozenBoard] = None):
+        super().__init__(reason, puzzle, solution)
+        self.reason = reason
+        self.puzzle = puzzle
+        self.solution = solution
+
+    def __str__(self):
+        return f"puzzle generation aborted ({self.reason})"
+
+class CarveStats:
+    """Work done by one generation call, reported alongside its puzzle."""
+    __slots__ = ("attempts", "restarts", "uniqueness_checks", "elapsed")
+
+    def __init__(self):
+        self.attempts = 0            # carving passes over the givens
+        self.restarts = 0            # fresh solution boards after the first
+        self.uniqueness_checks = 0
+        self.elapsed = 0.0           # seconds
+
+    def as_dict(self) -> dict:
+        return {
+            "attempts": self.attempts,
+            "restarts": self.restarts,
+            "uniqueness_checks": self.uniqueness_checks,
+            "elapsed_ms": round(self.elapsed * 1000, 1),
+        }
+
+# Carving strategy knobs: a board is abandoned after STALL_ROUNDS perturbations
+# without a new hole, or right away if its first pass ends more than
+# MAX_FIRST_PASS_GAP holes short (deep targets are rarely reached from there).
+STALL_ROUNDS = 200
+PERTURB_CLUES = 2
+MAX_FIRST_PASS_GAP = 5
+
 # --- Carve with Unique-Solution Guarantee ---
-def make_puzzle_unique(solution: Grid, holes: int) -> Grid:
-    puzzle = [row[:] for row in solution]
-    cells = [(r, c) for r in range(9) for c in range(9)]
-    random.shuffle(cells)
-    removed = 0
-    attempts = 0
-    max_attempts = holes * 3  # Limit attempts to prevent infinite loops
-    
-    for r, c in cells:
-        if removed >= holes:
-            break
-        if attempts >= max_attempts:
-            # If we can't reach target holes, return what we have
-            print(f"⚠️ Reached max attempts, returning puzzle with {removed} holes instead of {holes}")
+class _Carver:
+    """
+    Removes givens from one solution while keeping the puzzle unique.
+    A pass tries each given once in random order. When passes run dry short
+    of the target, a few solution digits are put back so the next pass can
+    take a different route; passes that end shallower are rolled back.
+    """
+    def __init__(self, solution: BoardLike, oracle: str, budget: Optional[SearchBudget],
+                 stats: CarveStats):
+        self.solution = to_frozen(solution)
+        self.puzzle = to_board(solution)
+        self.count = UNIQUENESS_ORACLES.get(oracle, count_solutions_dlx)
+        # Persistent state: a removal is kept only if no solution puts a different
+        # digit in that cell; a rejected removal is rolled back with one place().
+        self.incremental = oracle == "incremental"
+        self.state = ConstraintState.from_board(self.puzzle) if self.incremental else None
+        self.budget = budget
+        self.stats = stats
+
+    def _put_back(self, i: int, n: int):
+        self.puzzle[i] = n
+        if self.state is not None:
+            self.state.place(i, n)
+
+    def _reset(self, puzzle: FrozenBoard):
+        self.puzzle = puzzle.thaw()
+        if self.incremental:
+            self.state = ConstraintState.from_board(self.puzzle)
+
+    def try_remove(self, i: int) -> bool:
+        keep = self.puzzle[i]
+        self.puzzle[i] = 0
+        self.stats.uniqueness_checks += 1
+        try:
+            if self.state is not None:
+                self.state.clear(i)
+                unique = not has_alternative(self.state, i, keep, self.budget)
+            else:
+                unique = self.count(self.puzzle, 2, self.budget) == 1
+        except BudgetExceeded:
+            self._put_back(i, keep)
+            raise
+        if not unique:
+            self._put_back(i, keep)  # revert if uniqueness lost
+        return unique
+
+    def carve_pass(self, holes: int, floor: int, levels: List[int],
+                   snapshots: Dict[int, FrozenBoard], last: List[int] = ()) -> int:
+        """
+        Remove givens until `holes` are empty, trying the cells in `last`
+        after the others. Returns the holes reached, or stops early once the
+        untried givens can no longer reach `floor` (a given that fails once
+        stays unremovable for the rest of the pass).
+        """
+        self.stats.attempts += 1
+        order = [i for i in range(81) if self.puzzle[i] and i not in last]
+        random.shuffle(order)
+        order += last
+        removed = 81 - len(order)
+        for k, i in enumerate(order):
+            if removed >= holes or removed + len(order) - k < floor:
+                break
+            if self.try_remove(i):
+                removed += 1
+                if removed in levels and removed not in snapshots:
+                    snapshots[removed] = self.puzzle.freeze()
+        return removed
+
+    def carve(self, holes: int, levels: List[int], snapshots: Dict[int, FrozenBoard],
+              max_gap: Optional[int] = None) -> Optional[str]:
+        """
+        Carve toward exactly `holes`, leaving the deepest puzzle reached in
+        self.puzzle. Returns None on success or the reason it gave up.
+        """
+        floor = 0 if max_gap is None else holes - max_gap
+        best = self.puzzle.freeze()
+        reached = 0
+        try:
+            reached = self.carve_pass(holes, floor, levels, snapshots)
+            best = self.puzzle.freeze()
+            if reached < floor:
+                return "stalled"  # early exit: this board is unlikely to get there
+            stalled = 0
+            while reached < holes and stalled < STALL_ROUNDS:
+                # Re-added clues go last, or the pass would just take them out again
+                empty = [i for i in range(81) if not self.puzzle[i]]
+                added = random.sample(empty, min(PERTURB_CLUES, len(empty)))
+                for i in added:
+                    self._put_back(i, self.solution[i])
+                now = self.carve_pass(holes, reached, levels, snapshots, added)
+                if now < reached:
+                    self._reset(best)
+                    stalled += 1
+                    continue
+                stalled = 0 if now > reached else stalled + 1
+                reached, best = now, self.puzzle.freeze()
+        except BudgetExceeded as e:
+            # Mid-perturbation the puzzle may hold re-added clues; keep the deeper one
+            if self.puzzle.empty_count() < best.empty_count():
+                self._reset(best)
+            return e.reason
+        return None if reached >= holes else "stalled"
+
+def make_puzzle_unique(solution: Board, holes: int, oracle: str = "incremental",
+                       budget: Optional[SearchBudget] = None) -> Board:
+    carver = _Carver(solution, oracle, budget, CarveStats())
+    carver.carve(holes, [holes], {})
+    return carver.puzzle
+
+class CarveResult(NamedTuple):
+    """
+    Outcome of carve_with_budget(): the deepest board's solution, puzzle and
+    snapshots, plus why the run ended short (from the last attempt, which
+    need not be the deepest one).
+    """
+    solution: Board
+    puzzle: FrozenBoard
+    snapshots: Dict[int, FrozenBoard]
+    reason: Optional[str]  # None when the target was reached
+    stats: CarveStats
+
+def carve_with_budget(levels: List[int], deadline: Optional[float] = None,
+                      max_nodes: Optional[int] = None, retries: int = 3,
+                      oracle: str = "incremental") -> CarveResult:
+    """
+    Carve fresh boards toward exactly max(levels) holes, restarting with a new
+    board (up to `retries` times) when one stalls or aborts.
+
+    Args:
+        deadline: Seconds allowed for all attempts together (None = no limit)
+        max_nodes: Search nodes allowed per board (None = no limit)
+
+    Returns:
+        CarveResult: the deepest board, and the reason the last attempt ended.
+    """
+    t0 = time.perf_counter()
+    stop_at = None if deadline is None else time.monotonic() + deadline
+    holes = max(levels)
+    stats = CarveStats()
+    best = None
+    for attempt in range(retries + 1):
+        if attempt:
+            stats.restarts += 1
+        carver = _Carver(make_full_board(), oracle, SearchBudget(stop_at, max_nodes), stats)
+        snapshots: Dict[int, FrozenBoard] = {}
+        # Bail out of shallow boards early while there are restarts left
+        reason = carver.carve(holes, levels, snapshots, MAX_FIRST_PASS_GAP if attempt < retries else None)
+        if best is None or carver.puzzle.empty_count() > best[1].empty_count():
+            best = (carver.solution, carver.puzzle.freeze(), snapshots)
+        if reason is None or reason == "deadline":
             break
-            
-        keep = puzzle[r][c]
-        if keep == 0:
-            continue
-            
-        puzzle[r][c] = 0
-        attempts += 1
-        
-        # Check uniqueness
-        if count_solutions(puzzle, limit=2) == 1:
-            removed += 1
-        else:
-            puzzle[r][c] = keep  # revert if uniqueness lost
-    
-    return puzzle
+    stats.elapsed = time.perf_counter() - t0
+    # On success the last attempt is also the deepest; otherwise report what
+    # ended the run (deadline, or retries used up), not the deepest board's reason
+    return CarveResult(*best, reason, stats)
 
 # --- Tiny Integration Surface ---
 class SudokuGame:
     def __init__(self):
-        self.puzzle: Grid = None
-        self.solution: Grid = None
-
-    def load_puzzle(self, puzzle: Grid, solution: Grid):
-        self.puzzle = [row[:] for row in puzzle]
-        self.solution = [row[:] for row in solution]
-
-    def new_game(self, difficulty: str):
-        holes = holes_for(difficulty)
-        sol = make_full_board()
-        puz = make_puzzle_unique(sol, holes)
+        self.puzzle: Optional[FrozenBoard] = None
+        self.solution: Optional[FrozenBoard] = None
+        self.abort_reason: Optional[str] = None  # why the last generation fell short
+        self.last_stats: Optional[CarveStats] = None
+
+    def load_puzzle(self, puzzle: BoardLike, solution: BoardLike):
+        self.puzzle = to_frozen(puzzle)
+        self.solution = to_frozen(solution)
+
+    def new_game(self, difficulty: str, deadline: Optional[float] = None,
+                 max_nodes: Optional[int] = None, retries: int = 3,
+                 best_effort: bool = True) -> Tuple[FrozenBoard, FrozenBoard]:
+        """
+        Generate a puzzle within an optional time (seconds) and per-board
+        node budget, retrying with a new board up to `retries` times. If every
+        attempt falls short, the deepest puzzle found is returned when
+        `best_effort` is set; otherwise GenerationAborted is raised.
+        """
+        sol, puz, _, reason, self.last_stats = carve_with_budget(
+            [holes_for(difficulty)], deadline, max_nodes, retries
+        )
+        self.abort_reason = reason
+        if reason is not None and not best_effort:
+            raise GenerationAborted(reason, puz, sol)
         self.load_puzzle(puz, sol)
-        return puz, sol
+        return self.puzzle, self.solution
+
+    def new_games(self, difficulties: Optional[List[str]] = None, deadline: Optional[float] = None,
+                  max_nodes: Optional[int] = None, retries: int = 3,
+                  best_effort: bool = True) -> Dict[str, Tuple[FrozenBoard, FrozenBoard]]:
+        """
+        One full board and one carving run for several difficulties at once.
+        Every tier but the hardest is passed through a random symmetry
+        transform so the puzzles don't visibly share a solution.
+        Budgets work as in new_game(). Tiers the run never reached get the
+        deepest puzzle found when `best_effort` is set and are left out
+        otherwise; abort_reason tells which happened. Defaults to every
+        difficulty.
+        """
+        if difficulties is None:
+            difficulties = DIFFICULTIES
+        levels = {d: holes_for(d) for d in difficulties}
+        sol, puz, snapshots, reason, self.last_stats = carve_with_budget(
+            list(levels.values()), deadline, max_nodes, retries
+        )
+        self.abort_reason = reason
+        deepest = max(levels.values())
+        games = {}
+        for d, holes in levels.items():
+            if holes in snapshots:
+                found = snapshots[holes]
+            elif best_effort:
+                found = puz
+            else:
+                continue
+            games[d] = (found, sol) if holes == deepest else derive(found, sol)
+        return games
 
 
 # =========================================
@@ -425,18 +637,13 @@ def run_integration_test(difficulty: Optional[str] = None):
     print_board(solver.current_grid, "Initial Puzzle")
 
     # Add one correct value at the first empty
-    empty = None
-    for r in range(9):
-        for c in range(9):
-            if solver.current_grid[r][c] == 0:
-                empty = (r, c); break
-        if empty: break
+    empty = find_empty(solver.current_grid)
 
     if empty:
         r, c = empty
-        val = solution[r][c]
+        val = solution[r, c]
         solver.make_user_move(r, c, val)
-        assert solver.current_grid[r][c] == val
+        assert solver.current_grid[r, c] == val
         print(f"✅ Add Value Passed: Placed {val} at ({r}, {c}).")
 
     # Clear latest
@@ -0,0 +1,213 @@
+"""
+Compact Board Type
+81 cells in one flat byte buffer (0 = empty) instead of nested lists.
+
+Besides 9x9 lists a board has two compact wire forms: the 81-character
+string ('0' or '.' for empty) and "packed", two cells per byte (high nibble
+first, 41 bytes), usually sent as 56 characters of base64.
+"""
+
+import base64
+import binascii
+import json
+from typing import Iterable, List, Optional, Union
+
+Grid = List[List[int]]
+
+_TO_CHARS = bytes.maketrans(bytes(range(10)), b"0123456789")
+# Every byte other than 0-9 and '.' maps to 0xFF so from_string's range check rejects it
+_FROM_CHARS = bytes(
+    b - 0x30 if 0x30 <= b <= 0x39 else 0 if b == 0x2E else 0xFF for b in range(256)
+)
+_HIGH_NIBBLE = bytes(b >> 4 for b in range(256))
+_LOW_NIBBLE = bytes(b & 0xF for b in range(256))
+_TO_HIGH_NIBBLE = bytes((b << 4) & 0xFF for b in range(256))
+PACKED_SIZE = 41
+
+
+class _BoardBase:
+    """Read-only operations shared by Board and FrozenBoard."""
+    __slots__ = ("cells",)
+
+    def __getitem__(self, pos) -> int:
+        """board[i] for a flat index 0..80, board[r, c] for a cell."""
+        if isinstance(pos, tuple):
+            r, c = pos
+            return self.cells[r * 9 + c]
+        return self.cells[pos]
+
+    def __len__(self) -> int:
+        return 81
+
+    def __iter__(self):
+        return iter(self.cells)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, _BoardBase):
+            return self.cells == other.cells
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}('{self.to_string()}')"
+
+    def to_grid(self) -> Grid:
+        """Wire format: 9x9 nested lists."""
+        cells = self.cells
+        return [list(cells[r * 9:r * 9 + 9]) for r in range(9)]
+
+    def to_string(self) -> str:
+        """81-character string, '0' for empty cells."""
+        return bytes(self.cells).translate(_TO_CHARS).decode("ascii")
+
+    def to_packed(self) -> bytes:
+        """41 bytes, two cells per byte (high nibble first)."""
+        cells = bytes(self.cells) + b"\x00"
+        high = int.from_bytes(cells[0::2].translate(_TO_HIGH_NIBBLE), "big")
+        low = int.from_bytes(cells[1::2], "big")
+        return (high | low).to_bytes(PACKED_SIZE, "big")
+
+    def to_base64(self) -> str:
+        return base64.b64encode(self.to_packed()).decode("ascii")
+
+    def empty_count(self) -> int:
+        return self.cells.count(0)
+
+    def is_full(self) -> bool:
+        return 0 not in self.cells
+
+
+class Board(_BoardBase):
+    """
+    Mutable 81-byte board. Copying is a single 81-byte buffer copy.
+    """
+    __slots__ = ()
+
+    def __init__(self, cells: Optional[Iterable[int]] = None):
+        self.cells = bytearray(81) if cells is None else bytearray(cells)
+        if len(self.cells) != 81:
+            raise ValueError("board must have 81 cells")
+
+    @classmethod
+    def from_grid(cls, grid: Grid) -> "Board":
+        return cls(v for row in grid for v in row)
+
+    @classmethod
+    def from_string(cls, text: str) -> "Board":
+        """Parse an 81-character string ('0' or '.' for empty)."""
+        board = cls.__new__(cls)
+        board.cells = bytearray(text.encode("ascii", "replace").translate(_FROM_CHARS))
+        if len(board.cells) != 81 or max(board.cells) > 9:
+            raise ValueError("board string must be 81 characters of 0-9 or '.'")
+        return board
+
+    @classmethod
+    def from_packed(cls, data: bytes) -> "Board":
+        """Inverse of to_packed()."""
+        if len(data) != PACKED_SIZE:
+            raise ValueError(f"packed board must be {PACKED_SIZE} bytes")
+        cells = bytearray(PACKED_SIZE * 2)
+        cells[0::2] = data.translate(_HIGH_NIBBLE)
+        cells[1::2] = data.translate(_LOW_NIBBLE)
+        if cells.pop() or max(cells) > 9:
+            raise ValueError("packed board cells must be 0-9")
+        board = cls.__new__(cls)
+        board.cells = cells
+        return board
+
+    @classmethod
+    def from_base64(cls, text: str) -> "Board":
+        try:
+            data = base64.b64decode(text, validate=True)
+        except (binascii.Error, ValueError):
+            raise ValueError("board is not valid base64")
+        return cls.from_packed(data)
+
+    def __setitem__(self, pos, n: int):
+        if isinstance(pos, tuple):
+            r, c = pos
+            pos = r * 9 + c
+        self.cells[pos] = n
+
+    __hash__ = None  # mutable
+
+    def copy(self) -> "Board":
+        board = Board.__new__(Board)
+        board.cells = self.cells[:]
+        return board
+
+    def freeze(self) -> "FrozenBoard":
+        return FrozenBoard(self.cells)
+
+
+class FrozenBoard(_BoardBase):
+    """
+    Immutable, hashable board backed by bytes. Safe to share between pools,
+    caches and threads without copying.
+    """
+    __slots__ = ()
+
+    def __init__(self, cells: Iterable[int]):
+        self.cells = bytes(cells)
+        if len(self.cells) != 81:
+            raise ValueError("board must have 81 cells")
+
+    @classmethod
+    def from_grid(cls, grid: Grid) -> "FrozenBoard":
+        return cls(v for row in grid for v in row)
+
+    @classmethod
+    def from_string(cls, text: str) -> "FrozenBoard":
+        return Board.from_string(text).freeze()
+
+    @classmethod
+    def from_base64(cls, text: str) -> "FrozenBoard":
+        return Board.from_base64(text).freeze()
+
+    def __hash__(self) -> int:
+        return hash(self.cells)
+
+    def copy(self) -> "FrozenBoard":
+        return self
+
+    def thaw(self) -> Board:
+        return Board(self.cells)
+
+
+def to_board(value: Union[_BoardBase, Grid]) -> Board:
+    """Return a fresh mutable Board from a Board, FrozenBoard or 9x9 grid."""
+    if isinstance(value, _BoardBase):
+        return Board(value.cells)
+    return Board.from_grid(value)
+
+
+def to_frozen(value: Union[_BoardBase, Grid]) -> FrozenBoard:
+    """Return a FrozenBoard, reusing the argument when it already is one."""
+    if isinstance(value, FrozenBoard):
+        return value
+    if isinstance(value, _BoardBase):
+        return FrozenBoard(value.cells)
+    return FrozenBoard.from_grid(value)
+
+
+WIRE_FORMATS = ("grid", "string", "base64")
+
+
+def to_wire(board: _BoardBase, fmt: str = "grid") -> Union[Grid, str]:
+    """Encode a board as 9x9 lists, an 81-character string or base64 packed."""
+    if fmt == "string":
+        return board.to_string()
+    if fmt == "base64":
+        return board.to_base64()
+    return board.to_grid()
+
+
+def response_body(difficulty: str, puzzle: _BoardBase, solution: _BoardBase) -> bytes:
+    """
+    The /api/generate JSON body for a puzzle (same fields and order as
+    GenerateResponse, without a game session).
+    """
+    return json.dumps(
+        {"puzzle": puzzle.to_grid(), "solution": solution.to_grid(),
+         "difficulty": difficulty, "game_id": None},
+        separators=(",", ":"),
+    ).encode()
@@ -0,0 +1,139 @@
+"""
+Append-Only Puzzle Cache Store
+Crash-safe persistence for PuzzleCache pools: new puzzles and consumptions are
+appended as single lines, and the log is compacted with an atomic rename.
+
+Log lines:
+    A <difficulty> <81-char puzzle> <81-char solution>    puzzle added
+    T <difficulty> <81-char puzzle>                       puzzle taken (tombstone)
+A torn final line from a crash mid-write is ignored on replay.
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from board import FrozenBoard
+
+Puzzle = Tuple[FrozenBoard, FrozenBoard]
+
+
+class PuzzleStore:
+    """
+    Buffers add/take records in memory and appends them on flush().
+    flush() writes nothing when no records are pending.
+    """
+
+    def __init__(self, path: str, legacy_json: Optional[str] = None):
+        self.path = path
+        self.legacy_json = legacy_json
+        self.pending: List[str] = []
+        self.live = 0   # puzzles represented in the log
+        self.dead = 0   # add+tombstone pairs that compaction would drop
+        self.lock = threading.Lock()      # guards pending/live/dead
+        self.io_lock = threading.Lock()   # serializes flush and compaction
+
+    # ---- Loading ----
+    def load(self, difficulties: Iterable[str]) -> Tuple[Dict[str, List[Puzzle]], bool]:
+        """
+        Replay the log (or import the legacy JSON cache if there is no log).
+        Returns (puzzles per difficulty, whether the log should be compacted).
+        """
+        entries: Dict[str, "OrderedDict[str, str]"] = {d: OrderedDict() for d in difficulties}
+        needs_compaction = False
+
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="ascii", errors="replace") as f:
+                for line in f:
+                    if not line.endswith("\n"):
+                        needs_compaction = True  # torn write
+                        break
+                    parts = line.split()
+                    if len(parts) == 4 and parts[0] == "A" and parts[1] in entries:
+                        entries[parts[1]][parts[2]] = parts[3]
+                    elif len(parts) == 3 and parts[0] == "T" and parts[1] in entries:
+                        entries[parts[1]].pop(parts[2], None)
+                        self.dead += 1
+                    else:
+                        needs_compaction = True
+        elif self.legacy_json and os.path.exists(self.legacy_json):
+            with open(self.legacy_json, "r") as f:
+                data = json.load(f)
+            for diff in entries:
+                for item in data.get(diff, []):
+                    puzzle = FrozenBoard.from_grid(item["puzzle"]).to_string()
+                    entries[diff][puzzle] = FrozenBoard.from_grid(item["solution"]).to_string()
+            needs_compaction = True
+
+        pools: Dict[str, List[Puzzle]] = {}
+        for diff, items in entries.items():
+            pools[diff] = []
+            for puzzle, solution in items.items():
+                try:
+                    pools[diff].append((FrozenBoard.from_string(puzzle), FrozenBoard.from_string(solution)))
+                except ValueError:
+                    needs_compaction = True
+        self.live = sum(len(p) for p in pools.values())
+        return pools, needs_compaction
+
+    # ---- Recording ----
+    def record_added(self, difficulty: str, puzzle: FrozenBoard, solution: FrozenBoard):
+        with self.lock:
+            self.pending.append(f"A {difficulty} {puzzle.to_string()} {solution.to_string()}\n")
+            self.live += 1
+
+    def record_taken(self, difficulty: str, puzzle: FrozenBoard):
+        with self.lock:
+            self.pending.append(f"T {difficulty} {puzzle.to_string()}\n")
+            self.live -= 1
+            self.dead += 1
+
+    def needs_compaction(self) -> bool:
+        with self.lock:
+            return self.dead > max(64, 2 * self.live)
+
+    # ---- Writing ----
+    def flush(self) -> int:
+        """Append pending records to the log. Returns the number written."""
+        with self.io_lock:
+            with self.lock:
+                lines, self.pending = self.pending, []
+            if not lines:
+                return 0
+            with open(self.path, "a", encoding="ascii") as f:
+                f.write("".join(lines))
+                f.flush()
+                os.fsync(f.fileno())
+            return len(lines)
+
+    def discard_pending(self, live: int):
+        """
+        Drop buffered records because a compaction snapshot already reflects
+        them. Call under the same lock that guards the pools being snapshotted.
+        """
+        with self.lock:
+            self.pending = []
+            self.live = live
+            self.dead = 0
+
+    def compact(self, snapshot: Callable[[], Dict[str, List[Puzzle]]]):
+        """
+        Rewrite the log as one add record per live puzzle, via temp file + rename.
+        `snapshot` copies the pools and calls discard_pending() atomically; it
+        runs while flushes are blocked so no record can land in the old file.
+        """
+        tmp = self.path + ".tmp"
+        with self.io_lock:
+            pools = snapshot()
+            lines = [
+                f"A {diff} {puzzle.to_string()} {solution.to_string()}\n"
+                for diff, items in pools.items()
+                for puzzle, solution in items
+            ]
+            with open(tmp, "w", encoding="ascii") as f:
+                f.write("".join(lines))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
@@ -0,0 +1,6 @@
+# backend/ is also a package (for uvicorn backend.fastapi_app), but its modules
+# import each other as top-level names; make those resolvable under pytest.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -0,0 +1,160 @@
+"""
+Dancing Links (Algorithm X) Solution Counter
+Exact-cover formulation of Sudoku used as a fast uniqueness oracle.
+"""
+
+from typing import Optional
+
+from board import Board
+from solver_engine import ConstraintState, SearchBudget, propagate
+
+# =========================================
+# Exact-Cover Matrix Template
+# =========================================
+# Columns 1..324 (0 is the root header):
+#   cell (r, c) filled      -> 1 + i
+#   row r has digit d       -> 82 + r*9 + d
+#   col c has digit d       -> 163 + c*9 + d
+#   box b has digit d       -> 244 + b*9 + d
+# Candidate row k = i*9 + d (d = digit - 1) owns nodes 325 + 4k .. 325 + 4k + 3.
+_NCOLS = 324
+_FIRST_NODE = _NCOLS + 1
+
+
+def _row_columns(i: int, d: int):
+    r, c = divmod(i, 9)
+    b = (r // 3) * 3 + c // 3
+    return (1 + i, 82 + r * 9 + d, 163 + c * 9 + d, 244 + b * 9 + d)
+
+
+def _build_template():
+    size = _FIRST_NODE + 729 * 4
+    L = list(range(size))
+    R = list(range(size))
+    U = list(range(size))
+    D = list(range(size))
+    C = list(range(size))
+    S = [0] * (_NCOLS + 1)
+
+    # Header ring: root <-> 1 <-> ... <-> 324 <-> root
+    for h in range(_NCOLS + 1):
+        L[h] = h - 1 if h else _NCOLS
+        R[h] = h + 1 if h < _NCOLS else 0
+
+    for k in range(729):
+        i, d = divmod(k, 9)
+        base = _FIRST_NODE + 4 * k
+        for j, col in enumerate(_row_columns(i, d)):
+            node = base + j
+            C[node] = col
+            L[node] = base + (j - 1) % 4
+            R[node] = base + (j + 1) % 4
+            # Append to the bottom of the column
+            U[node] = U[col]
+            D[node] = col
+            D[U[col]] = node
+            U[col] = node
+            S[col] += 1
+    return L, R, U, D, C, S
+
+
+_L, _R, _U, _D, _C, _S = _build_template()
+
+
+# =========================================
+# Counter
+# =========================================
+def count_solutions_dlx(b: Board, limit: int = 2, budget: Optional[SearchBudget] = None) -> int:
+    """
+    Count solutions of `b` with Algorithm X, stopping once `limit` are found.
+    Same contract as count_solutions(); conflicting givens yield 0, and an
+    exhausted `budget` raises BudgetExceeded (the link arrays are per call,
+    so abandoning the search mid-cover is safe).
+    Naked/hidden singles are propagated first, so boards that need no search
+    never build the link structure.
+    """
+    state = ConstraintState.from_board(b)
+    if state is None or not propagate(state, []):
+        return 0
+    if state.pick_cell()[0] < 0:
+        return 1
+
+    L, R, U, D, S = _L[:], _R[:], _U[:], _D[:], _S[:]
+    C = _C
+
+    def cover(c):
+        L[R[c]] = L[c]
+        R[L[c]] = R[c]
+        i = D[c]
+        while i != c:
+            j = R[i]
+            while j != i:
+                U[D[j]] = U[j]
+                D[U[j]] = D[j]
+                S[C[j]] -= 1
+                j = R[j]
+            i = D[i]
+
+    def uncover(c):
+        i = U[c]
+        while i != c:
+            j = L[i]
+            while j != i:
+                S[C[j]] += 1
+                U[D[j]] = j
+                D[U[j]] = j
+                j = L[j]
+            i = U[i]
+        L[R[c]] = c
+        R[L[c]] = c
+
+    # Select the rows for the givens
+    covered = bytearray(_NCOLS + 1)
+    for i, n in enumerate(state.cells):
+        if n:
+            cols = _row_columns(i, n - 1)
+            for col in cols:
+                if covered[col]:
+                    return 0
+            for col in cols:
+                covered[col] = 1
+                cover(col)
+
+    found = 0
+
+    def search():
+        nonlocal found
+        if budget is not None:
+            budget.spend()
+        c = R[0]
+        if c == 0:
+            found += 1
+            return
+        # Column with the fewest remaining rows
+        best, best_size = c, S[c]
+        c = R[c]
+        while c and best_size > 1:
+            if S[c] < best_size:
+                best, best_size = c, S[c]
+            c = R[c]
+        if best_size == 0:
+            return
+        cover(best)
+        r = D[best]
+        while r != best:
+            j = R[r]
+            while j != r:
+                cover(C[j])
+                j = R[j]
+            search()
+            j = L[r]
+            while j != r:
+                uncover(C[j])
+                j = L[j]
+            if found >= limit:
+                break
+            r = D[r]
+        uncover(best)
+
+    search()
+    return found
@@ -1,11 +1,24 @@
-from typing import List, Optional
-
-from fastapi import FastAPI, HTTPException
+import asyncio
+import json
+import time
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Union
+
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, WebSocket
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field
+
+import result_cache
+import step_codec
+from board import WIRE_FORMATS, Board, response_body, to_wire
+from game_sessions import GameSession, sessions
+from logic_solver import MAX_GUESSES
+from solver_engine import analyze_board
+from symmetry import derive
 from Sudoko_backend import (
-    SudokuGame, SudokuSolver, generate_stepwise_path,
+    SudokuGame, SudokuSolver,
     get_puzzle_stats, is_puzzle_complete, is_puzzle_correct,
     get_valid_numbers_for_cell
 )
@@ -22,30 +35,50 @@ except ImportError:
 
 # Types
 Grid = List[List[int]]
+# Request grids: 9x9 lists, an 81-character string ('0' or '.' for empty) or
+# base64 of the 41-byte packed form (see board.py). Strings skip the
+# per-cell pydantic validation; parse_grid() checks every form.
+GridInput = Union[str, Grid]
+# Response grids: 9x9 lists unless ?format=string|base64 asks for a compact form
+GridOutput = Union[Grid, str]
+
+# Latency budget for /api/generate: how long a cache miss waits on the
+# background generator before the request carves its own puzzle, and the
+# deadline for that request-time carve (best effort: the deepest unique
+# puzzle found in time is served, even if short of the target holes).
+CACHE_WAIT_SECONDS = 3.0
+GENERATE_DEADLINE_SECONDS = 2.0
+GENERATE_RETRIES = 2
+
+# Request-time carves in flight, one per difficulty: a burst of misses shares
+# a single carve instead of each request starting its own.
+_fallback_carves: Dict[str, "asyncio.Future"] = {}
 
 
 class GenerateRequest(BaseModel):
     difficulty: Optional[str] = "medium"
+    session: bool = False  # Also open a server-side game session
 
 
 class SolveRequest(BaseModel):
-    grid: List[List[int]]
+    grid: GridInput
 
 
 class GenerateResponse(BaseModel):
-    puzzle: Grid
-    solution: Grid
+    puzzle: GridOutput
+    solution: GridOutput
     difficulty: str
+    game_id: Optional[str] = None
 
 
 class SolveResponse(BaseModel):
     solved: bool
-    solution: Optional[Grid] = None
+    solution: Optional[GridOutput] = None
 
 
 class HintRequest(BaseModel):
-    grid: List[List[int]]
-    solution: List[List[int]]
+    grid: GridInput
+    solution: GridInput
 
 
 class HintResponse(BaseModel):
@@ -56,18 +89,24 @@ class HintResponse(BaseModel):
 
 
 class StepwisePathRequest(BaseModel):
-    grid: List[List[int]]
-    solution: List[List[int]]
+    grid: GridInput
+    solution: GridInput
+    offset: int = Field(0, ge=0, le=81)          # Skip this many steps (paging); a path has at most 81
+    max_steps: Optional[int] = Field(None, ge=1)  # Return at most this many steps
+    stream: bool = False                         # NDJSON stream instead of one JSON body
 
 
 class StepwisePathResponse(BaseModel):
     success: bool
     steps: List[List[int]]  # List of [row, col, value] tuples
+    techniques: List[str] = []  # Technique behind each step (e.g. "hidden_single")
+    next_offset: Optional[int] = None  # Offset of the next page, None on the last one
+    total_steps: Optional[int] = None
     message: Optional[str] = None
 
 
 class PuzzleStatsRequest(BaseModel):
-    grid: List[List[int]]
+    grid: GridInput
 
 
 class PuzzleStatsResponse(BaseModel):
@@ -78,8 +117,8 @@ class PuzzleStatsResponse(BaseModel):
 
 
 class ValidatePuzzleRequest(BaseModel):
-    grid: List[List[int]]
-    solution: Optional[List[List[int]]] = None
+    grid: GridInput
+    solution: Optional[GridInput] = None
 
 
 class ValidatePuzzleResponse(BaseModel):
@@ -89,7 +128,7 @@ class ValidatePuzzleResponse(BaseModel):
 
 
 class ValidNumbersRequest(BaseModel):
-    grid: List[List[int]]
+    grid: GridInput
     row: int
     col: int
 
@@ -100,6 +139,19 @@ class ValidNumbersResponse(BaseModel):
     is_filled: bool
 
 
+class AnalyzeRequest(BaseModel):
+    grid: GridInput
+
+
+class AnalyzeResponse(BaseModel):
+    candidates: List[int]        # 81 nine-bit masks (bit k = digit k+1), 0 for filled cells
+    conflicts: List[List[int]]   # [i, j] flat cell indices (r*9 + c) holding the same digit in a shared unit
+    row_counts: List[int]        # Filled cells per row, column and box
+    col_counts: List[int]
+    box_counts: List[int]
+    empty_count: int
+
+
 app = FastAPI(title="Sudoku API", version="1.0.0")
 
 # Allow all origins for local development (file:// or localhost)
@@ -112,6 +164,32 @@ app.add_middleware(
 )
 
 
+def parse_grid(g: GridInput, name: str = "grid") -> Board:
+    """
+    Load a request grid in any wire form into a Board, answering 400 for a
+    bad shape or value. Each form is checked in bulk rather than cell by cell.
+    """
+    if isinstance(g, str):
+        try:
+            return Board.from_string(g) if len(g) == 81 else Board.from_base64(g)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"{name}: {e}")
+    if not isinstance(g, list) or len(g) != 9 or any(not isinstance(row, list) or len(row) != 9 for row in g):
+        raise HTTPException(status_code=400, detail=f"{name} must be 9x9")
+    try:
+        board = Board(v for row in g for v in row)
+    except (TypeError, ValueError):  # bytearray rejects non-ints and values outside 0..255
+        board = None
+    if board is None or max(board.cells) > 9:
+        raise HTTPException(status_code=400, detail=f"{name} values must be integers 0..9")
+    return board
+
+
+def grid_format(format: str = Query("grid", pattern=f"^({'|'.join(WIRE_FORMATS)})$")) -> str:
+    """?format= for endpoints that return grids: grid (default), string or base64."""
+    return format
+
+
 @app.on_event("startup")
 async def startup_event():
     """Pre-fill the puzzle cache on startup for instant responses."""
@@ -137,10 +215,16 @@ async def startup_event():
 @app.get("/api/cache-stats")
 def cache_stats():
     """Get current puzzle cache statistics."""
+    results = {
+        "solve": result_cache.solve_cache.stats(),
+        "stepwise_path": result_cache.path_cache.stats(),
+    }
     if not CACHE_AVAILABLE:
         return {
             "cache_available": False,
-            "message": "Cache not available - using direct generation"
+            "message": "Cache not available - using direct generation",
+            "results": results,
+            "sessions": sessions.stats()
         }
     
     cache = get_cache()
@@ -149,7 +233,14 @@ def cache_stats():
         "cache_available": True,
         "stats": stats,
         "total": sum(stats.values()),
-        "pool_size": cache.pool_size
+        "pool_size": cache.pool_size,
+        "bank_remaining": cache.bank.remaining() if cache.bank is not None else None,
+        "demand": cache.scheduler.stats(),
+        "derived": cache.derived_count,
+        "aborted": cache.aborted_count,
+        "generation": cache.generation_totals,
+        "results": results,
+        "sessions": sessions.stats()
     }
 
 
@@ -158,9 +249,70 @@ def health():
     return {"status": "ok"}
 
 
+def generate_within_deadline(difficulty: str):
+    """Request-time generation: retry new boards until the deadline, then serve the best."""
+    game = SudokuGame()
+    puzzle, solution = game.new_game(
+        difficulty, deadline=GENERATE_DEADLINE_SECONDS, retries=GENERATE_RETRIES, best_effort=True
+    )
+    result_cache.seed_solution(puzzle, solution)
+    if game.abort_reason is not None:
+        print(f"⚠️ Serving best-effort {difficulty} puzzle with {puzzle.empty_count()} holes "
+              f"({game.abort_reason}, {game.last_stats.as_dict()})")
+    return puzzle, solution
+
+
+async def shared_fallback(difficulty: str):
+    """
+    Carve in the request, but at most once per difficulty at a time. The
+    request that starts the carve gets its puzzle; requests that join it get
+    a symmetry variant, so concurrent misses don't all receive the same grid.
+    """
+    carve = _fallback_carves.get(difficulty)
+    joined = carve is not None
+    if not joined:
+        carve = asyncio.ensure_future(run_in_threadpool(generate_within_deadline, difficulty))
+        _fallback_carves[difficulty] = carve
+        carve.add_done_callback(lambda _: _fallback_carves.pop(difficulty, None))
+    # Shielded: a joiner's disconnect must not cancel the carve for the others
+    puzzle, solution = await asyncio.shield(carve)
+    if joined:
+        puzzle, solution = derive(puzzle, solution)
+        result_cache.seed_solution(puzzle, solution)
+    return puzzle, solution
+
+
+async def next_puzzle(difficulty: str, request: Optional[Request] = None):
+    """
+    Await a puzzle without holding a worker thread. Cache misses wait on the
+    generator's single-flight queue; if the client disconnects first, the
+    request is cancelled and its puzzle goes to the next waiter or the pool.
+    A miss that outlasts CACHE_WAIT_SECONDS falls back to a request-time carve
+    shared with other misses of the same difficulty (see shared_fallback).
+    Without a `request` (e.g. on a WebSocket) disconnects are not polled.
+    Returns (puzzle, solution, body): body is the cache's pre-encoded
+    /api/generate response, or None for a puzzle carved in the request.
+    """
+    if not CACHE_AVAILABLE:
+        return (*await shared_fallback(difficulty), None)
+    
+    waiter = asyncio.wrap_future(get_cache().request_puzzle(difficulty))
+    waited = 0.0
+    while True:
+        done, _ = await asyncio.wait({waiter}, timeout=0.5)
+        if done:
+            return waiter.result()
+        if request is not None and await request.is_disconnected():
+            waiter.cancel()  # also cancels the cache's future
+            raise HTTPException(status_code=499, detail="client disconnected")
+        waited += 0.5
+        if waited >= CACHE_WAIT_SECONDS:
+            waiter.cancel()
+            return (*await shared_fallback(difficulty), None)
+
+
 @app.post("/api/generate", response_model=GenerateResponse)
-def generate(body: GenerateRequest):
-    import time
+async def generate(body: GenerateRequest, request: Request, fmt: str = Depends(grid_format)):
     start_time = time.time()
     
     difficulty = (body.difficulty or "medium").lower()
@@ -168,119 +320,239 @@ def generate(body: GenerateRequest):
         raise HTTPException(status_code=400, detail="difficulty must be one of: easy, medium, hard, expert")
     
     # Use cached puzzle if available, otherwise generate directly
-    if CACHE_AVAILABLE:
-        cache = get_cache()
-        puzzle, solution = cache.get_puzzle(difficulty)
-    else:
-        game = SudokuGame()
-        puzzle, solution = game.new_game(difficulty)
+    puzzle, solution, cached_body = await next_puzzle(difficulty, request)
     
     elapsed = time.time() - start_time
     print(f"⏱️ Generated {difficulty} puzzle in {elapsed:.2f}s")
     
-    return {"puzzle": puzzle, "solution": solution, "difficulty": difficulty}
+    # Hot path: the cache's pre-encoded body, no model validation or encoding
+    if cached_body is not None and not body.session and fmt == "grid":
+        return Response(content=cached_body, media_type="application/json")
+    game_id = sessions.create(puzzle, solution, difficulty).id if body.session else None
+    return {"puzzle": to_wire(puzzle, fmt), "solution": to_wire(solution, fmt), "difficulty": difficulty,
+            "game_id": game_id}
 
 
 @app.get("/api/generate", response_model=GenerateResponse)
-def generate_get(difficulty: Optional[str] = "medium"):
+async def generate_get(request: Request, difficulty: Optional[str] = "medium", session: bool = False,
+                       fmt: str = Depends(grid_format)):
     difficulty_lc = (difficulty or "medium").lower()
     if difficulty_lc not in {"easy", "medium", "hard", "expert"}:
         raise HTTPException(status_code=400, detail="difficulty must be one of: easy, medium, hard, expert")
     
     # Use cached puzzle if available, otherwise generate directly
-    if CACHE_AVAILABLE:
-        cache = get_cache()
-        puzzle, solution = cache.get_puzzle(difficulty_lc)
-    else:
-        game = SudokuGame()
-        puzzle, solution = game.new_game(difficulty_lc)
+    puzzle, solution, cached_body = await next_puzzle(difficulty_lc, request)
     
-    return {"puzzle": puzzle, "solution": solution, "difficulty": difficulty_lc}
+    if cached_body is not None and not session and fmt == "grid":
+        return Response(content=cached_body, media_type="application/json")
+    game_id = sessions.create(puzzle, solution, difficulty_lc).id if session else None
+    return {"puzzle": to_wire(puzzle, fmt), "solution": to_wire(solution, fmt), "difficulty": difficulty_lc,
+            "game_id": game_id}
 
 
-@app.post("/api/solve", response_model=SolveResponse)
-def solve(body: SolveRequest):
-    # Validate grid shape and values
-    g = body.grid
-    if not isinstance(g, list) or len(g) != 9 or any(not isinstance(row, list) or len(row) != 9 for row in g):
-        raise HTTPException(status_code=400, detail="grid must be 9x9")
-    for r in range(9):
-        for c in range(9):
-            val = g[r][c]
-            if not isinstance(val, int) or not (0 <= val <= 9):
-                raise HTTPException(status_code=400, detail="grid values must be integers 0..9")
+# =========================================
+# Batch Generation
+# =========================================
+MAX_BATCH_PUZZLES = 10  # Per difficulty
 
+
+class GenerateBatchRequest(BaseModel):
+    difficulties: List[str] = ["medium"]
+    count: int = Field(1, ge=1, le=MAX_BATCH_PUZZLES)  # Puzzles per difficulty
+
+
+async def generate_batch_response(difficulties: List[str], count: int, request: Request) -> Response:
+    """
+    Up to `count` puzzles per difficulty in one body:
+        {"puzzles": {"easy": [<GenerateResponse>, ...], ...}}
+    Stock comes from PuzzleCache.take_many() in one pass; a difficulty the
+    cache had nothing for gets a single puzzle via next_puzzle(), so every
+    requested difficulty has at least one. Cached entries are spliced in as
+    their pre-encoded bodies.
+    """
+    wanted = list(dict.fromkeys((d or "").lower() for d in difficulties))
+    if not wanted or any(d not in {"easy", "medium", "hard", "expert"} for d in wanted):
+        raise HTTPException(status_code=400, detail="difficulty must be one of: easy, medium, hard, expert")
+
+    taken = get_cache().take_many({d: count for d in wanted}) if CACHE_AVAILABLE else {}
+    short = [d for d in wanted if not taken.get(d)]
+    if short:
+        fetched = await asyncio.gather(*(next_puzzle(d, request) for d in short))
+        taken.update((d, [entry]) for d, entry in zip(short, fetched))
+
+    sections = (
+        json.dumps(d).encode() + b":["
+        + b",".join(body if body is not None else response_body(d, puzzle, solution)
+                    for puzzle, solution, body in taken[d])
+        + b"]"
+        for d in wanted
+    )
+    return Response(content=b'{"puzzles":{' + b",".join(sections) + b"}}", media_type="application/json")
+
+
+@app.post("/api/generate-batch")
+async def generate_batch(body: GenerateBatchRequest, request: Request):
+    return await generate_batch_response(body.difficulties, body.count, request)
+
+
+@app.get("/api/generate-batch")
+async def generate_batch_get(request: Request, difficulty: str = "medium",
+                             count: int = Query(1, ge=1, le=MAX_BATCH_PUZZLES)):
+    """`difficulty` is one name or a comma-separated list, e.g. ?difficulty=easy,hard&count=3"""
+    return await generate_batch_response(difficulty.split(","), count, request)
+
+
+@app.post("/api/solve", response_model=SolveResponse)
+def solve(body: SolveRequest, fmt: str = Depends(grid_format)):
     # Solve a provided 9x9 grid (0 represents empty).
-    grid_copy = [row[:] for row in g]
+    board = parse_grid(body.grid)
+    key = result_cache.board_key(board)
+    known = result_cache.solve_cache.get(key)
+    if known is not None:
+        return {"solved": True, "solution": to_wire(known, fmt)}
+    
     solver = SudokuSolver()
-    # Load a blank puzzle/solution so we can reuse the recursive solver
-    solver.current_grid = grid_copy
-    ok = solver._solve_recursive(grid_copy)  # type: ignore[attr-defined]
-    return {"solved": bool(ok), "solution": grid_copy if ok else None}
+    solver.current_grid = board
+    ok = solver.solve_grid(board)
+    if ok:
+        result_cache.solve_cache.put(key, board.freeze())
+    return {"solved": bool(ok), "solution": to_wire(board, fmt) if ok else None}
 
 
 @app.post("/api/hint", response_model=HintResponse)
 def hint(body: HintRequest):
-    # Validate shapes
-    g, s = body.grid, body.solution
-    if (not isinstance(g, list) or len(g) != 9 or any(len(row) != 9 for row in g)
-        or not isinstance(s, list) or len(s) != 9 or any(len(row) != 9 for row in s)):
-        raise HTTPException(status_code=400, detail="grid and solution must be 9x9")
+    grid = parse_grid(body.grid)
+    solution = parse_grid(body.solution, "solution")
 
     # Find first empty cell and return the solution value
-    for r in range(9):
-        for c in range(9):
-            if g[r][c] == 0:
-                return {"has_hint": True, "row": r, "col": c, "value": s[r][c]}
-    return {"has_hint": False}
+    i = grid.cells.find(0)
+    if i < 0:
+        return {"has_hint": False}
+    return {"has_hint": True, "row": i // 9, "col": i % 9, "value": solution[i]}
+
+
+class StepPage:
+    """
+    One page of a lazily computed logical path. Iterating yields the steps in
+    [offset, offset + max_steps); afterwards `success`, `next_offset` and
+    `message` describe the page. Only one step past the page is computed.
+    Complete paths are kept in the result cache and replayed from there.
+    """
+    def __init__(self, solver: SudokuSolver, offset: int = 0, max_steps: Optional[int] = None):
+        self.total = solver.current_grid.empty_count()
+        self.offset = offset
+        self.max_steps = max_steps
+        grid, solution = solver.current_grid, solver.solution_grid
+        cached = result_cache.cached_path(grid, solution)
+        if cached is not None:
+            self.path = iter(cached)
+        else:
+            self.path = self._recording(solver.iter_logical_path(), grid.freeze(), solution.freeze())
+        self.emitted = 0
+        self.success = False
+        self.next_offset: Optional[int] = None
+        self.message = ""
+        self.stop_reason: Optional[str] = None
+
+    def _recording(self, path: Iterator[tuple], grid, solution) -> Iterator[tuple]:
+        """
+        Pass steps through; cache the path if it is consumed to a full solve,
+        and keep the solver's reason if it stopped short (see MAX_GUESSES).
+        """
+        steps = []
+        while True:
+            try:
+                step = next(path)
+            except StopIteration as end:
+                self.stop_reason = end.value
+                break
+            steps.append(step)
+            yield step
+        if len(steps) == self.total:
+            result_cache.store_path(grid, solution, tuple(steps))
+    
+    def __iter__(self) -> Iterator[tuple]:
+        stop = None if self.max_steps is None else self.offset + self.max_steps
+        for step in islice(self.path, self.offset, stop):
+            self.emitted += 1
+            yield step
+        end = self.offset + self.emitted
+        if end >= self.total:
+            self.success = self.emitted > 0 or self.offset == self.total
+        elif stop is not None and end == stop and next(self.path, None) is not None:
+            self.success, self.next_offset = True, end
+        if not self.success and self.offset > self.total:
+            self.message = f"offset is past the last step ({self.total})"
+        elif not self.success and self.stop_reason == "guess_limit":
+            self.message = f"Puzzle needs more than {MAX_GUESSES} guesses to solve"
+        elif not self.success:
+            self.message = "Puzzle could not be solved"
+        else:
+            self.message = f"Generated steps {self.offset}-{end} of {self.total}"
+
+
+def stream_steps(page: StepPage) -> Iterator[bytes]:
+    """NDJSON frames: one object per step, then a summary frame."""
+    for r, c, v, technique in page:
+        yield json.dumps({"row": r, "col": c, "value": v, "technique": technique}).encode() + b"\n"
+    yield json.dumps({
+        "done": True, "success": page.success, "next_offset": page.next_offset,
+        "total_steps": page.total, "message": page.message,
+    }).encode() + b"\n"
 
 
 @app.post("/api/stepwise-path", response_model=StepwisePathResponse)
-def get_stepwise_path(body: StepwisePathRequest):
+def get_stepwise_path(body: StepwisePathRequest, request: Request):
     """
     Generate a stepwise path for animating the solution.
-    Returns a list of moves [row, col, value] that show how the puzzle is solved.
+    Returns one move [row, col, value] per empty cell, in the order a person
+    could deduce them, plus the technique used for each move.
+    `offset`/`max_steps` page through the path; with `stream` the steps are
+    sent as NDJSON while they are being computed. Clients that send
+    Accept: application/x-sudoku-steps get the page as packed 16-bit
+    records instead (see step_codec.py).
     """
-    # Validate shapes
-    g, s = body.grid, body.solution
-    if (not isinstance(g, list) or len(g) != 9 or any(len(row) != 9 for row in g)
-        or not isinstance(s, list) or len(s) != 9 or any(len(row) != 9 for row in s)):
-        raise HTTPException(status_code=400, detail="grid and solution must be 9x9")
-    
-    # Validate grid values
-    for r in range(9):
-        for c in range(9):
-            val = g[r][c]
-            if not isinstance(val, int) or not (0 <= val <= 9):
-                raise HTTPException(status_code=400, detail="grid values must be integers 0..9")
+    grid = parse_grid(body.grid)
+    solution = parse_grid(body.solution, "solution")
     
     try:
-        # Create solver instance to track moves
         solver = SudokuSolver()
-        solver.solution_grid = s  # Set solution for reference
-        solver.moves_made_by_solver = []  # Clear previous moves
+        solver.current_grid = grid
+        solver.solution_grid = solution  # Used for guesses when logic runs out
+        page = StepPage(solver, body.offset, body.max_steps)
         
-        # Solve the puzzle to generate moves
-        grid_copy = [row[:] for row in g]
-        solved = solver._solve_recursive(grid_copy)  # type: ignore[attr-defined]
+        packed, encoding = step_codec.accepts_packed(request.headers.get("accept", ""))
+        if body.stream and not packed:
+            return StreamingResponse(stream_steps(page), media_type="application/x-ndjson")
         
-        if not solved:
+        start = time.perf_counter()
+        path = list(page)
+        if packed:
+            data = step_codec.encode_steps(
+                path if page.success else [], page.success, page.total, body.offset,
+                page.next_offset is not None, time.perf_counter() - start, encoding,
+            )
+            return Response(content=data, media_type=step_codec.MEDIA_TYPE)
+        
+        # Convert tuples to lists for JSON serialization
+        if not page.success:
             return {
                 "success": False,
                 "steps": [],
-                "message": "Puzzle could not be solved"
+                "total_steps": page.total,
+                "message": page.message
             }
         
-        # Get the stepwise path
-        path = generate_stepwise_path(solver)
-        
-        # Convert tuples to lists for JSON serialization
-        steps = [[r, c, v] for r, c, v in path]
+        steps = [[r, c, v] for r, c, v, _ in path]
+        techniques = [technique for _, _, _, technique in path]
         
         return {
             "success": True,
             "steps": steps,
-            "message": f"Generated {len(steps)} steps"
+            "techniques": techniques,
+            "next_offset": page.next_offset,
+            "total_steps": page.total,
+            "message": f"{page.message} ({techniques.count('guess')} guesses)"
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating stepwise path: {str(e)}")
@@ -291,19 +563,11 @@ def get_puzzle_stats_endpoint(body: PuzzleStatsRequest):
     """
     Get statistics about a puzzle (filled cells, empty cells, completion percentage).
     """
-    g = body.grid
-    if not isinstance(g, list) or len(g) != 9 or any(not isinstance(row, list) or len(row) != 9 for row in g):
-        raise HTTPException(status_code=400, detail="grid must be 9x9")
-    
-    for r in range(9):
-        for c in range(9):
-            val = g[r][c]
-            if not isinstance(val, int) or not (0 <= val <= 9):
-                raise HTTPException(status_code=400, detail="grid values must be integers 0..9")
+    grid = parse_grid(body.grid)
     
     try:
         solver = SudokuSolver()
-        solver.current_grid = [row[:] for row in g]
+        solver.current_grid = grid
         stats = get_puzzle_stats(solver)
         return stats
     except Exception as e:
@@ -315,32 +579,19 @@ def validate_puzzle(body: ValidatePuzzleRequest):
     """
     Validate if a puzzle is complete and optionally check if it's correct.
     """
-    g = body.grid
-    s = body.solution
-    
-    if not isinstance(g, list) or len(g) != 9 or any(not isinstance(row, list) or len(row) != 9 for row in g):
-        raise HTTPException(status_code=400, detail="grid must be 9x9")
-    
-    for r in range(9):
-        for c in range(9):
-            val = g[r][c]
-            if not isinstance(val, int) or not (0 <= val <= 9):
-                raise HTTPException(status_code=400, detail="grid values must be integers 0..9")
-    
-    if s is not None:
-        if not isinstance(s, list) or len(s) != 9 or any(not isinstance(row, list) or len(row) != 9 for row in s):
-            raise HTTPException(status_code=400, detail="solution must be 9x9")
+    grid = parse_grid(body.grid)
+    solution = parse_grid(body.solution, "solution") if body.solution is not None else None
     
     try:
         solver = SudokuSolver()
-        solver.current_grid = [row[:] for row in g]
+        solver.current_grid = grid
         
         is_complete = is_puzzle_complete(solver)
         is_correct = None
         message = "Puzzle is complete" if is_complete else "Puzzle has empty cells"
         
-        if s is not None:
-            solver.solution_grid = [row[:] for row in s]
+        if solution is not None:
+            solver.solution_grid = solution
             is_correct = is_puzzle_correct(solver)
             if is_complete:
                 message = "Puzzle is complete and correct" if is_correct else "Puzzle is complete but incorrect"
@@ -361,27 +612,18 @@ def get_valid_numbers(body: ValidNumbersRequest):
     """
     Get all valid numbers that can be placed in a specific cell.
     """
-    g = body.grid
     row = body.row
     col = body.col
-    
-    if not isinstance(g, list) or len(g) != 9 or any(not isinstance(row, list) or len(row) != 9 for row in g):
-        raise HTTPException(status_code=400, detail="grid must be 9x9")
+    grid = parse_grid(body.grid)
     
     if not (0 <= row < 9 and 0 <= col < 9):
         raise HTTPException(status_code=400, detail="row and col must be between 0 and 8")
     
-    for r in range(9):
-        for c in range(9):
-            val = g[r][c]
-            if not isinstance(val, int) or not (0 <= val <= 9):
-                raise HTTPException(status_code=400, detail="grid values must be integers 0..9")
-    
     try:
         solver = SudokuSolver()
-        solver.current_grid = [row[:] for row in g]
+        solver.current_grid = grid
         
-        cell_value = solver.current_grid[row][col]
+        cell_value = solver.current_grid[row, col]
         is_filled = cell_value != 0
         valid_nums = get_valid_numbers_for_cell(solver, row, col) if not is_filled else []
         
@@ -394,6 +636,318 @@ def get_valid_numbers(body: ValidNumbersRequest):
         raise HTTPException(status_code=500, detail=f"Error getting valid numbers: {str(e)}")
 
 
+@app.post("/api/analyze", response_model=AnalyzeResponse)
+def analyze(body: AnalyzeRequest):
+    """
+    Whole-board analysis in one request: pencil marks for every empty cell,
+    conflicting cell pairs and fill counts (replaces a /api/valid-numbers
+    call per cell).
+    """
+    return analyze_board(parse_grid(body.grid))
+
+
+# =========================================
+# Batch Operations
+# =========================================
+# One grid (and optional solution), any number of typed operations:
+#   {"op": "stats"} / "validate" / "hint" / "solve"
+#   {"op": "valid_numbers", "row": r, "col": c}
+# An op that returns grids takes "format": "grid" | "string" | "base64".
+#   {"op": "analyze"}                          same body as /api/analyze
+# The grid is validated and loaded into a single SudokuSolver up front; each
+# result is the matching endpoint's response body, or {"error": ...} for an
+# operation that could not run.
+
+MAX_BATCH_OPS = 100
+
+
+class BatchOperation(BaseModel):
+    op: str
+    row: Optional[int] = Field(None, ge=0, le=8)
+    col: Optional[int] = Field(None, ge=0, le=8)
+    format: str = Field("grid", pattern=f"^({'|'.join(WIRE_FORMATS)})$")  # Grids in the result
+
+
+class BatchRequest(BaseModel):
+    grid: GridInput
+    solution: Optional[GridInput] = None
+    ops: List[BatchOperation] = Field(..., min_length=1, max_length=MAX_BATCH_OPS)
+
+
+class BatchResponse(BaseModel):
+    results: List[dict]
+
+
+def _batch_cell(op: BatchOperation):
+    if op.row is None or op.col is None:
+        raise ValueError(f"{op.op} needs row and col")
+    return op.row, op.col
+
+
+def _batch_solution(solver: SudokuSolver) -> Board:
+    if solver.solution_grid is None:
+        raise ValueError("this operation needs a solution")
+    return solver.solution_grid
+
+
+def _batch_hint(solver: SudokuSolver, op: BatchOperation) -> dict:
+    solution = _batch_solution(solver)
+    empty = solver._find_empty(solver.current_grid)
+    if empty is None:
+        return {"has_hint": False}
+    r, c = empty
+    return {"has_hint": True, "row": r, "col": c, "value": solution[r, c]}
+
+
+def _batch_validate(solver: SudokuSolver, op: BatchOperation) -> dict:
+    is_complete = is_puzzle_complete(solver)
+    if solver.solution_grid is None:
+        return {"is_complete": is_complete, "is_correct": None,
+                "message": "Puzzle is complete" if is_complete else "Puzzle has empty cells"}
+    is_correct = is_puzzle_correct(solver)
+    if is_complete:
+        message = "Puzzle is complete and correct" if is_correct else "Puzzle is complete but incorrect"
+    else:
+        message = "Puzzle is incomplete"
+    return {"is_complete": is_complete, "is_correct": is_correct, "message": message}
+
+
+def _batch_valid_numbers(solver: SudokuSolver, op: BatchOperation) -> dict:
+    row, col = _batch_cell(op)
+    value = solver.current_grid[row, col]
+    return {
+        "valid_numbers": get_valid_numbers_for_cell(solver, row, col),
+        "cell_value": value,
+        "is_filled": value != 0,
+    }
+
+
+def _batch_solve(solver: SudokuSolver, op: BatchOperation) -> dict:
+    key = result_cache.board_key(solver.current_grid)
+    known = result_cache.solve_cache.get(key)
+    if known is None:
+        board = solver.current_grid.copy()
+        if not solver.solve_grid(board):
+            return {"solved": False, "solution": None}
+        known = board.freeze()
+        result_cache.solve_cache.put(key, known)
+    return {"solved": True, "solution": to_wire(known, op.format)}
+
+
+BATCH_OPS = {
+    "stats": lambda solver, op: get_puzzle_stats(solver),
+    "validate": _batch_validate,
+    "hint": _batch_hint,
+    "valid_numbers": _batch_valid_numbers,
+    "solve": _batch_solve,
+    "analyze": lambda solver, op: analyze_board(solver.current_grid),
+}
+
+
+@app.post("/api/batch", response_model=BatchResponse)
+def batch(body: BatchRequest):
+    """
+    Run several read-only queries against one grid in a single request.
+    Results come back in request order, each tagged with its "op".
+    """
+    solver = SudokuSolver()
+    solver.current_grid = parse_grid(body.grid)
+    if body.solution is not None:
+        solver.solution_grid = parse_grid(body.solution, "solution")
+
+    results = []
+    for op in body.ops:
+        handler = BATCH_OPS.get(op.op)
+        try:
+            if handler is None:
+                raise ValueError(f"unknown op: {op.op!r}")
+            results.append({"op": op.op, **handler(solver, op)})
+        except ValueError as e:
+            results.append({"op": op.op, "error": str(e)})
+    return {"results": results}
+
+
+# =========================================
+# Game Sessions
+# =========================================
+# Create one with /api/generate?session=true (or "session": true in the POST
+# body), then send single-cell moves against the returned game_id.
+
+class GameMoveRequest(BaseModel):
+    row: int = Field(..., ge=0, le=8)
+    col: int = Field(..., ge=0, le=8)
+    value: int = Field(..., ge=0, le=9)  # 0 clears the cell
+
+
+def get_session(game_id: str) -> GameSession:
+    session = sessions.get(game_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="game not found or expired")
+    return session
+
+
+@app.get("/api/games/{game_id}")
+def game_state(game_id: str, fmt: str = Depends(grid_format)):
+    return get_session(game_id).state(fmt)
+
+
+@app.delete("/api/games/{game_id}")
+def end_game(game_id: str):
+    if not sessions.delete(game_id):
+        raise HTTPException(status_code=404, detail="game not found or expired")
+    return {"deleted": True}
+
+
+@app.post("/api/games/{game_id}/move")
+def game_move(game_id: str, body: GameMoveRequest):
+    return get_session(game_id).move(body.row, body.col, body.value)
+
+
+@app.post("/api/games/{game_id}/undo")
+def game_undo(game_id: str):
+    return get_session(game_id).undo()
+
+
+@app.post("/api/games/{game_id}/reset")
+def game_reset(game_id: str, fmt: str = Depends(grid_format)):
+    return get_session(game_id).reset(fmt)
+
+
+@app.get("/api/games/{game_id}/hint", response_model=HintResponse)
+def game_hint(game_id: str):
+    return get_session(game_id).hint()
+
+
+@app.get("/api/games/{game_id}/valid-numbers", response_model=ValidNumbersResponse)
+def game_valid_numbers(game_id: str, row: int = Query(..., ge=0, le=8), col: int = Query(..., ge=0, le=8)):
+    return get_session(game_id).valid_numbers(row, col)
+
+
+@app.get("/api/games/{game_id}/analysis", response_model=AnalyzeResponse)
+def game_analysis(game_id: str):
+    return get_session(game_id).analysis()
+
+
+@app.get("/api/games/{game_id}/stats", response_model=PuzzleStatsResponse)
+def game_stats(game_id: str):
+    return get_session(game_id).stats()
+
+
+@app.get("/api/games/{game_id}/validate")
+def game_validate(game_id: str):
+    return get_session(game_id).validate()
+
+
+# =========================================
+# WebSocket Game Channel
+# =========================================
+# One connection carries a whole game. Client messages are JSON objects with
+# a "type" (plus an optional "id" echoed back in the reply):
+#   {"type": "new", "difficulty": "hard"}     start a game (solution stays server-side)
+#   {"type": "join", "game_id": "..."}        attach to an existing session
+#   {"type": "move", "row": r, "col": c, "value": v}
+#   {"type": "undo"} / "reset" / "hint" / "validate" / "stats" / "state"
+#   {"type": "valid_numbers", "row": r, "col": c}
+#   {"type": "analyze"}                       pencil marks, conflicts and fill counts
+# A move can also be sent as a 2-byte binary frame: [r * 9 + c, value].
+# When the board fills up (or a full board's correctness changes) the server
+# pushes {"type": "completed", "solved": ...}.
+
+def _ws_int(message: dict, key: str, high: int) -> int:
+    value = message.get(key)
+    if not isinstance(value, int) or isinstance(value, bool) or not 0 <= value <= high:
+        raise ValueError(f"{key} must be an integer 0..{high}")
+    return value
+
+
+WS_ACTIONS = {
+    "state": lambda session, m: session.state(),
+    "move": lambda session, m: session.move(_ws_int(m, "row", 8), _ws_int(m, "col", 8), _ws_int(m, "value", 9)),
+    "undo": lambda session, m: session.undo(),
+    "reset": lambda session, m: session.reset(),
+    "hint": lambda session, m: session.hint(),
+    "validate": lambda session, m: session.validate(),
+    "stats": lambda session, m: session.stats(),
+    "analyze": lambda session, m: session.analysis(),
+    "valid_numbers": lambda session, m: session.valid_numbers(_ws_int(m, "row", 8), _ws_int(m, "col", 8)),
+}
+
+
+@app.websocket("/ws/game")
+async def game_channel(websocket: WebSocket, game_id: Optional[str] = None):
+    """
+    Game channel; connect with ?game_id=... to resume a session. Session
+    operations are in-memory and lock-protected, so they run inline on the
+    event loop instead of through the threadpool.
+    """
+    await websocket.accept()
+    session = sessions.get(game_id) if game_id else None
+    last_status = (False, False)  # (complete, solved) last reported to the client
+    if session is not None:
+        state = session.state()
+        await websocket.send_json({"type": "state", **state})
+        last_status = (state["complete"], state["solved"])
+    
+    while True:
+        frame = await websocket.receive()
+        if frame["type"] == "websocket.disconnect":
+            break
+        
+        reply = {}
+        try:
+            if frame.get("bytes") is not None:
+                data = frame["bytes"]
+                if len(data) != 2 or data[0] > 80:
+                    raise ValueError("binary move must be 2 bytes: cell index 0..80, value")
+                message = {"type": "move", "row": data[0] // 9, "col": data[0] % 9, "value": data[1]}
+            else:
+                message = json.loads(frame.get("text") or "")
+                if not isinstance(message, dict):
+                    raise ValueError("message must be a JSON object")
+            kind = message.get("type")
+            reply = {"type": kind, "id": message.get("id")}
+            
+            if kind == "new":
+                difficulty = str(message.get("difficulty") or "medium").lower()
+                if difficulty not in {"easy", "medium", "hard", "expert"}:
+                    raise ValueError("difficulty must be one of: easy, medium, hard, expert")
+                try:
+                    puzzle, solution, _ = await next_puzzle(difficulty)
+                except HTTPException as e:  # request-time fallback failed
+                    raise ValueError(f"could not generate a puzzle: {e.detail}")
+                except RuntimeError as e:   # the cache is shutting down
+                    raise ValueError(f"could not generate a puzzle: {e}")
+                session = sessions.create(puzzle, solution, difficulty)
+                reply.update(session.state())
+            elif kind == "join":
+                session = sessions.get(str(message.get("game_id")))
+                if session is None:
+                    raise ValueError("game not found or expired")
+                reply.update(session.state())
+            elif kind in WS_ACTIONS:
+                # Re-fetch so an active connection keeps its session from expiring
+                if session is None or sessions.get(session.id) is None:
+                    raise ValueError("no active game: send 'new' or 'join' first")
+                reply.update(WS_ACTIONS[kind](session, message))
+            else:
+                raise ValueError(f"unknown message type: {kind!r}")
+        except (ValueError, TypeError) as e:  # json.JSONDecodeError is a ValueError
+            reply = {"type": "error", "id": reply.get("id"), "detail": str(e)}
+        
+        await websocket.send_json(reply)
+        
+        # Push a completion event when the board fills up or a full board's
+        # correctness changes
+        if session is not None and "complete" in reply:
+            status = (reply["complete"], reply["solved"])
+            if reply["complete"] and status != last_status:
+                await websocket.send_json({
+                    "type": "completed", "game_id": session.id,
+                    "solved": reply["solved"], "elapsed": reply["elapsed"],
+                })
+            last_status = status
+
+
 # Optional root for simple message
 @app.get("/")
 def root():
@@ -0,0 +1,184 @@
+"""
+Server-Side Game Sessions
+One SudokuSolver per game, held in a bounded store with TTL/LRU eviction.
+Clients send single-cell moves against an id instead of re-uploading the
+grid (and solution) with every gameplay request.
+"""
+
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from board import FrozenBoard, to_wire
+from solver_engine import analyze_board
+from Sudoko_backend import SudokuSolver
+
+
+class GameSession:
+    """
+    A game's solver state. Every operation takes the session lock, so moves
+    arriving on concurrent requests for the same game apply one at a time.
+    Operations return JSON-ready dicts.
+    """
+
+    def __init__(self, game_id: str, puzzle: FrozenBoard, solution: FrozenBoard, difficulty: str):
+        self.id = game_id
+        self.difficulty = difficulty
+        self.solver = SudokuSolver()
+        self.solver.load_puzzle(puzzle, solution)
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+    # ---- Queries ----
+    def _status(self) -> dict:
+        solver = self.solver
+        complete = solver.is_puzzle_complete()
+        solved = complete and solver.is_puzzle_correct()
+        if solved:
+            solver.stop_game_timer()
+        return {
+            "complete": complete,
+            "solved": solved,
+            "elapsed": round(solver.get_elapsed_time(), 1),
+        }
+
+    def state(self, fmt: str = "grid") -> dict:
+        """`fmt` is a board.WIRE_FORMATS name for the puzzle and grid."""
+        with self.lock:
+            return {
+                "game_id": self.id,
+                "difficulty": self.difficulty,
+                "puzzle": to_wire(self.solver.initial_puzzle, fmt),
+                "grid": to_wire(self.solver.current_grid, fmt),
+                **self._status(),
+            }
+
+    def hint(self) -> dict:
+        """Solution value for the first empty cell (not applied)."""
+        with self.lock:
+            empty = self.solver._find_empty(self.solver.current_grid)
+            if empty is None:
+                return {"has_hint": False}
+            r, c = empty
+            return {"has_hint": True, "row": r, "col": c, "value": self.solver.solution_grid[r, c]}
+
+    def valid_numbers(self, row: int, col: int) -> dict:
+        with self.lock:
+            value = self.solver.current_grid[row, col]
+            return {
+                "valid_numbers": self.solver.get_valid_numbers_for_cell(row, col),
+                "cell_value": value,
+                "is_filled": value != 0,
+            }
+
+    def analysis(self) -> dict:
+        """Candidates, conflicts and fill counts for the current grid (see analyze_board)."""
+        with self.lock:
+            return analyze_board(self.solver.current_grid)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return self.solver.get_puzzle_stats()
+
+    def validate(self) -> dict:
+        with self.lock:
+            status = self._status()
+            if status["complete"]:
+                message = "Puzzle is complete and correct" if status["solved"] else "Puzzle is complete but incorrect"
+            else:
+                message = "Puzzle is incomplete"
+            return {"is_complete": status["complete"], "is_correct": status["solved"],
+                    "message": message, "elapsed": status["elapsed"]}
+
+    # ---- Moves ----
+    def move(self, row: int, col: int, value: int) -> dict:
+        """Place (or with 0, clear) one cell. Givens cannot be changed."""
+        with self.lock:
+            accepted = self.solver.make_user_move(row, col, value)
+            correct = None
+            if accepted and value:
+                correct = self.solver.solution_grid[row, col] == value
+            return {"accepted": accepted, "correct": correct, **self._status()}
+
+    def undo(self) -> dict:
+        """Clear the latest entry (clear_latest_entry)."""
+        with self.lock:
+            undone = self.solver.clear_latest_entry()
+            return {"undone": undone, **self._status()}
+
+    def reset(self, fmt: str = "grid") -> dict:
+        with self.lock:
+            self.solver.reset_grid()
+            self.solver.start_game_timer()
+            return {"grid": to_wire(self.solver.current_grid, fmt), **self._status()}
+
+
+class GameSessionStore:
+    """
+    Sessions by id. An access refreshes a session; sessions idle for more
+    than `ttl` seconds expire, and the least recently used one is evicted
+    once `maxsize` are live.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 2 * 3600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self._sessions: "OrderedDict[str, GameSession]" = OrderedDict()
+        self.created = 0
+        self.evicted = 0
+        self.expired = 0
+
+    def create(self, puzzle: FrozenBoard, solution: FrozenBoard, difficulty: str) -> GameSession:
+        session = GameSession(secrets.token_urlsafe(12), puzzle, solution, difficulty)
+        with self.lock:
+            self._expire(time.monotonic())
+            self._sessions[session.id] = session
+            self.created += 1
+            while len(self._sessions) > self.maxsize:
+                self._sessions.popitem(last=False)
+                self.evicted += 1
+        return session
+
+    def get(self, game_id: str) -> Optional[GameSession]:
+        now = time.monotonic()
+        with self.lock:
+            session = self._sessions.get(game_id)
+            if session is None:
+                return None
+            if now - session.last_used > self.ttl:
+                del self._sessions[game_id]
+                self.expired += 1
+                return None
+            session.last_used = now
+            self._sessions.move_to_end(game_id)
+            return session
+
+    def delete(self, game_id: str) -> bool:
+        with self.lock:
+            return self._sessions.pop(game_id, None) is not None
+
+    def _expire(self, now: float):
+        """Drop idle sessions from the LRU end. Caller holds self.lock."""
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_used <= self.ttl:
+                break
+            self._sessions.popitem(last=False)
+            self.expired += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "active": len(self._sessions),
+                "maxsize": self.maxsize,
+                "created": self.created,
+                "evicted": self.evicted,
+                "expired": self.expired,
+            }
+
+
+# Process-wide session store used by the API
+sessions = GameSessionStore()
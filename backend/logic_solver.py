@@ -0,0 +1,274 @@
+"""
+Logical Step Solver
+Solves the way a person would: each step is one placement justified by a named
+technique, so a stepwise path has at most one step per empty cell and no undos.
+
+Techniques, easiest first:
+    naked_single, hidden_single         place a digit
+    locked_candidates, naked_pair, hidden_pair, naked_triple, hidden_triple,
+    x_wing, swordfish                   eliminate candidates, then retry singles
+    guess                               last resort: take the known solution's
+                                        digit for the cell with fewest candidates
+A placement is tagged with the hardest technique used since the previous one.
+"""
+
+from itertools import combinations
+from typing import Generator, List, Optional, Tuple
+
+from board import Board
+from solver_engine import (
+    ALL_DIGITS, BIT, BOX_OF, COL_OF, DIGITS_IN, PEERS, POPCOUNT, ROW_OF, UNITS,
+    ConstraintState, solve_board
+)
+
+LogicStep = Tuple[int, int, int, str]  # (row, col, value, technique)
+
+TECHNIQUES = (
+    "naked_single", "hidden_single", "locked_candidates",
+    "naked_pair", "hidden_pair", "naked_triple", "hidden_triple",
+    "x_wing", "swordfish", "guess",
+)
+_RANK = {name: k for k, name in enumerate(TECHNIQUES)}
+
+# Guesses allowed per path. The hardest published puzzles need about five;
+# past that a path stops being something a person could follow.
+MAX_GUESSES = 5
+
+ROWS, COLS, BOXES = UNITS[:9], UNITS[9:18], UNITS[18:]
+_LINE_OF = (ROW_OF, COL_OF)
+
+
+class _Candidates:
+    """Values plus a 9-bit candidate mask per cell (0 for filled cells)."""
+    __slots__ = ("cells", "masks")
+
+    def __init__(self, state: ConstraintState):
+        self.cells = list(state.cells)
+        self.masks = [0 if n else state.candidates(i) for i, n in enumerate(state.cells)]
+
+    def place(self, i: int, n: int):
+        self.cells[i] = n
+        self.masks[i] = 0
+        bit = ~BIT[n]
+        masks = self.masks
+        for p in PEERS[i]:
+            masks[p] &= bit
+
+    def eliminate(self, cells, bits: int) -> bool:
+        """Remove `bits` from each cell in `cells`; True if anything changed."""
+        changed = False
+        masks = self.masks
+        for i in cells:
+            if masks[i] & bits:
+                masks[i] &= ~bits
+                changed = True
+        return changed
+
+
+# =========================================
+# Placements
+# =========================================
+def _naked_single(g: _Candidates) -> Optional[Tuple[int, int]]:
+    for i, m in enumerate(g.masks):
+        if m and POPCOUNT[m] == 1:
+            return i, DIGITS_IN[m][0]
+    return None
+
+
+def _hidden_single(g: _Candidates) -> Optional[Tuple[int, int]]:
+    masks = g.masks
+    for unit in UNITS:
+        once = twice = 0
+        for i in unit:
+            twice |= once & masks[i]
+            once |= masks[i]
+        single = once & ~twice
+        if single:
+            bit = single & -single
+            for i in unit:
+                if masks[i] & bit:
+                    return i, DIGITS_IN[bit][0]
+    return None
+
+
+# =========================================
+# Eliminations
+# =========================================
+def _locked_candidates(g: _Candidates) -> bool:
+    masks = g.masks
+    # Pointing: a digit confined to one row/column of a box leaves the rest of that line
+    for box in BOXES:
+        for n in DIGITS_IN[ALL_DIGITS]:
+            bit = BIT[n]
+            spots = [i for i in box if masks[i] & bit]
+            if len(spots) < 2:
+                continue
+            for line_of, lines in zip(_LINE_OF, (ROWS, COLS)):
+                line = line_of[spots[0]]
+                if all(line_of[i] == line for i in spots):
+                    if g.eliminate((i for i in lines[line] if BOX_OF[i] != BOX_OF[spots[0]]), bit):
+                        return True
+    # Claiming: a digit confined to one box within a line leaves the rest of that box
+    for lines in (ROWS, COLS):
+        for line in lines:
+            for n in DIGITS_IN[ALL_DIGITS]:
+                bit = BIT[n]
+                spots = [i for i in line if masks[i] & bit]
+                if len(spots) < 2:
+                    continue
+                box = BOX_OF[spots[0]]
+                if all(BOX_OF[i] == box for i in spots):
+                    if g.eliminate((i for i in BOXES[box] if i not in line), bit):
+                        return True
+    return False
+
+
+def _naked_subset(g: _Candidates, size: int) -> bool:
+    """`size` cells of a unit sharing `size` candidates own those digits."""
+    masks = g.masks
+    for unit in UNITS:
+        cells = [i for i in unit if masks[i] and POPCOUNT[masks[i]] <= size]
+        if len(cells) < size:
+            continue
+        for group in combinations(cells, size):
+            union = 0
+            for i in group:
+                union |= masks[i]
+            if POPCOUNT[union] == size:
+                if g.eliminate((i for i in unit if i not in group), union):
+                    return True
+    return False
+
+
+def _hidden_subset(g: _Candidates, size: int) -> bool:
+    """`size` digits confined to the same `size` cells of a unit clear those cells' other candidates."""
+    masks = g.masks
+    for unit in UNITS:
+        spots = {}
+        for n in DIGITS_IN[ALL_DIGITS]:
+            where = frozenset(i for i in unit if masks[i] & BIT[n])
+            if 2 <= len(where) <= size:
+                spots[n] = where
+        if len(spots) < size:
+            continue
+        for digits in combinations(spots, size):
+            cells = frozenset().union(*(spots[n] for n in digits))
+            if len(cells) == size:
+                keep = 0
+                for n in digits:
+                    keep |= BIT[n]
+                if g.eliminate(cells, ALL_DIGITS & ~keep):
+                    return True
+    return False
+
+
+def _fish(g: _Candidates, size: int) -> bool:
+    """X-wing (size 2) / swordfish (size 3) on rows, then on columns."""
+    masks = g.masks
+    for bases, covers, cover_of in ((ROWS, COLS, COL_OF), (COLS, ROWS, ROW_OF)):
+        for n in DIGITS_IN[ALL_DIGITS]:
+            bit = BIT[n]
+            lines = {}
+            for k, line in enumerate(bases):
+                positions = 0
+                for i in line:
+                    if masks[i] & bit:
+                        positions |= 1 << cover_of[i]
+                if 2 <= POPCOUNT[positions] <= size:
+                    lines[k] = positions
+            if len(lines) < size:
+                continue
+            for group in combinations(lines, size):
+                union = 0
+                for k in group:
+                    union |= lines[k]
+                if POPCOUNT[union] != size:
+                    continue
+                base_cells = {i for k in group for i in bases[k]}
+                targets = (i for c in range(9) if union >> c & 1 for i in covers[c] if i not in base_cells)
+                if g.eliminate(targets, bit):
+                    return True
+    return False
+
+
+_ELIMINATIONS = (
+    ("locked_candidates", _locked_candidates),
+    ("naked_pair", lambda g: _naked_subset(g, 2)),
+    ("hidden_pair", lambda g: _hidden_subset(g, 2)),
+    ("naked_triple", lambda g: _naked_subset(g, 3)),
+    ("hidden_triple", lambda g: _hidden_subset(g, 3)),
+    ("x_wing", lambda g: _fish(g, 2)),
+    ("swordfish", lambda g: _fish(g, 3)),
+)
+
+
+# =========================================
+# Solving
+# =========================================
+def _resolve_solution(board: Board, solution: Optional[Board]) -> Optional[Board]:
+    """Use the caller's solution if it is a valid grid completing `board`, else solve for one."""
+    if solution is not None and solution.is_full() and all(
+        n == 0 or n == s for n, s in zip(board.cells, solution.cells)
+    ) and ConstraintState.from_board(solution) is not None:
+        return solution
+    solved = board.copy()
+    return solved if solve_board(solved) else None
+
+
+def iter_logical_steps(board: Board, solution: Optional[Board] = None,
+                       max_guesses: int = MAX_GUESSES) -> Generator[LogicStep, None, Optional[str]]:
+    """
+    Yield placements (row, col, value, technique) until the board is full.
+    `solution`, if it matches the givens, is used for guesses instead of
+    running a search. Stops early if the givens are contradictory or more
+    than `max_guesses` guesses would be needed; the generator returns
+    "guess_limit" in the latter case and None otherwise.
+    """
+    state = ConstraintState.from_board(board)
+    if state is None:
+        return
+    g = _Candidates(state)
+    known: Optional[Board] = None
+    guesses = 0
+    hardest = 0
+    while 0 in g.cells:
+        found = _naked_single(g)
+        technique = "naked_single"
+        if found is None:
+            found = _hidden_single(g)
+            technique = "hidden_single"
+        if found is None:
+            for name, rule in _ELIMINATIONS:
+                if rule(g):
+                    hardest = max(hardest, _RANK[name])
+                    break
+            else:
+                # Nothing deductive applies: guess at the cell with fewest candidates
+                if guesses >= max_guesses:
+                    return "guess_limit"
+                if known is None:
+                    known = _resolve_solution(board, solution)
+                    if known is None:
+                        return
+                empty = [i for i, m in enumerate(g.masks) if m]
+                if not empty:
+                    return  # an empty cell has no candidates left
+                i = min(empty, key=lambda j: POPCOUNT[g.masks[j]])
+                if not g.masks[i] & BIT[known[i]]:
+                    return  # the board has left the solution (e.g. a wrong entry)
+                found, technique = (i, known[i]), "guess"
+                guesses += 1
+            if found is None:
+                continue
+        i, n = found
+        if _RANK[technique] < hardest:
+            technique = TECHNIQUES[hardest]
+        hardest = 0
+        g.place(i, n)
+        yield ROW_OF[i], COL_OF[i], n, technique
+
+
+def solve_logically(board: Board, solution: Optional[Board] = None) -> Tuple[bool, List[LogicStep]]:
+    """Collect the logical path; returns (solved, steps)."""
+    steps = list(iter_logical_steps(board, solution))
+    return len(steps) == board.empty_count(), steps
@@ -0,0 +1,205 @@
+"""
+Memory-Mapped Puzzle Bank
+Pre-generated puzzles in one read-only binary file, drawn in O(1) without parsing.
+
+Layout (little-endian):
+    header   80 bytes: b"SUDOKUBK", u32 version, u32 record size,
+             then (u64 first_record, u64 count) for easy/medium/hard/expert
+    records  162 bytes each: 81 puzzle cells + 81 solution cells,
+             stored contiguously per difficulty
+
+Build one with:
+    python puzzle_bank.py puzzle_bank.bin --easy 10000 --medium 10000 --hard 10000 --expert 10000
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+from board import FrozenBoard
+from Sudoko_backend import GenerationAborted, SudokuGame
+
+Puzzle = Tuple[FrozenBoard, FrozenBoard]
+
+DIFFICULTIES = ("easy", "medium", "hard", "expert")
+MAGIC = b"SUDOKUBK"
+VERSION = 1
+RECORD_SIZE = 162
+
+_HEADER = struct.Struct("<8sII" + "QQ" * len(DIFFICULTIES))
+_CURSORS = struct.Struct("<" + "Q" * len(DIFFICULTIES))
+
+
+class PuzzleBank:
+    """
+    Read-only view over a puzzle bank file. Each difficulty has a cursor;
+    draw() hands out the next unused record until that section runs out.
+    Cursors are kept in a small "<path>.cursor" sidecar so restarts resume.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.cursor_file = path + ".cursor"
+        self.lock = threading.Lock()
+
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError("puzzle bank is empty")
+
+        fields = _HEADER.unpack_from(self._mm, 0)
+        magic, version, record_size = fields[:3]
+        if magic != MAGIC or version != VERSION or record_size != RECORD_SIZE:
+            self.close()
+            raise ValueError("not a puzzle bank file (bad header)")
+
+        self.index: Dict[str, Tuple[int, int]] = {}
+        for k, diff in enumerate(DIFFICULTIES):
+            first, count = fields[3 + 2 * k], fields[4 + 2 * k]
+            if _HEADER.size + (first + count) * RECORD_SIZE > len(self._mm):
+                self.close()
+                raise ValueError(f"puzzle bank truncated in {diff} section")
+            self.index[diff] = (first, count)
+
+        self.cursors: Dict[str, int] = {diff: 0 for diff in DIFFICULTIES}
+        self._load_cursors()
+        self._saved = self._packed_cursors()
+
+    @classmethod
+    def open(cls, path: str) -> Optional["PuzzleBank"]:
+        """Open a bank if the file exists and is valid, else return None."""
+        if not os.path.exists(path):
+            return None
+        try:
+            bank = cls(path)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"⚠️ Ignoring puzzle bank {path}: {e}")
+            return None
+        print(f"🏦 Opened puzzle bank with {sum(bank.remaining().values())} unused puzzles")
+        return bank
+
+    def _load_cursors(self):
+        try:
+            with open(self.cursor_file, "rb") as f:
+                saved = _CURSORS.unpack(f.read(_CURSORS.size))
+        except (OSError, struct.error):
+            return
+        for diff, cursor in zip(DIFFICULTIES, saved):
+            self.cursors[diff] = min(cursor, self.index[diff][1])
+
+    def _packed_cursors(self) -> bytes:
+        with self.lock:
+            return _CURSORS.pack(*(self.cursors[diff] for diff in DIFFICULTIES))
+
+    def save_cursors(self):
+        """Persist the per-difficulty cursors (atomic rename); no-op if unchanged."""
+        data = self._packed_cursors()
+        if data == self._saved:
+            return
+        tmp = self.cursor_file + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self.cursor_file)
+            self._saved = data
+        except OSError as e:
+            print(f"⚠️ Failed to save puzzle bank cursors: {e}")
+
+    def record(self, difficulty: str, n: int) -> Puzzle:
+        """Random access to the n-th record of a difficulty section."""
+        first, count = self.index[difficulty]
+        if not 0 <= n < count:
+            raise IndexError("puzzle bank record out of range")
+        offset = _HEADER.size + (first + n) * RECORD_SIZE
+        return (
+            FrozenBoard(self._mm[offset:offset + 81]),
+            FrozenBoard(self._mm[offset + 81:offset + RECORD_SIZE]),
+        )
+
+    def draw(self, difficulty: str) -> Optional[Puzzle]:
+        """Take the next unused puzzle, or None when the section is exhausted."""
+        with self.lock:
+            n = self.cursors.get(difficulty, 0)
+            if n >= self.index.get(difficulty, (0, 0))[1]:
+                return None
+            self.cursors[difficulty] = n + 1
+        return self.record(difficulty, n)
+
+    def remaining(self) -> Dict[str, int]:
+        with self.lock:
+            return {diff: self.index[diff][1] - self.cursors[diff] for diff in DIFFICULTIES}
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+
+# =========================================
+# Building
+# =========================================
+def write_bank(path: str, sections: Dict[str, Iterable[Puzzle]]) -> Dict[str, int]:
+    """
+    Stream puzzles into a new bank file, one difficulty section after another.
+    The file is written beside `path` and renamed into place when complete.
+    """
+    tmp = path + ".tmp"
+    counts: Dict[str, int] = {}
+    header_fields = []
+    with open(tmp, "wb") as f:
+        f.write(bytes(_HEADER.size))
+        first = 0
+        for diff in DIFFICULTIES:
+            count = 0
+            for puzzle, solution in sections.get(diff, ()):
+                f.write(puzzle.cells)
+                f.write(solution.cells)
+                count += 1
+            counts[diff] = count
+            header_fields += [first, count]
+            first += count
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, VERSION, RECORD_SIZE, *header_fields))
+    os.replace(tmp, path)
+    return counts
+
+
+def _generate_record(difficulty: str) -> Tuple[bytes, bytes]:
+    # Bank records must reach their difficulty's hole count: no best effort
+    game = SudokuGame()
+    while True:
+        try:
+            puzzle, solution = game.new_game(difficulty, best_effort=False)
+        except GenerationAborted:
+            continue
+        return puzzle.cells, solution.cells
+
+
+def build_bank(path: str, counts: Dict[str, int], workers: Optional[int] = None) -> Dict[str, int]:
+    """Generate puzzles on a process pool and write them to a new bank."""
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        def section(diff: str):
+            jobs = executor.map(_generate_record, [diff] * counts.get(diff, 0), chunksize=32)
+            for i, (puzzle, solution) in enumerate(jobs, 1):
+                if i % 1000 == 0:
+                    print(f"  ✓ {diff}: {i}/{counts[diff]}")
+                yield FrozenBoard(puzzle), FrozenBoard(solution)
+        return write_bank(path, {diff: section(diff) for diff in DIFFICULTIES})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a memory-mapped Sudoku puzzle bank")
+    parser.add_argument("path", nargs="?", default="puzzle_bank.bin")
+    for diff in DIFFICULTIES:
+        parser.add_argument(f"--{diff}", type=int, default=1000, help=f"number of {diff} puzzles")
+    parser.add_argument("--workers", type=int, default=None, help="generator processes (default: one per core)")
+    args = parser.parse_args()
+
+    print(f"🔧 Building puzzle bank {args.path}...")
+    written = build_bank(args.path, {diff: getattr(args, diff) for diff in DIFFICULTIES}, args.workers)
+    print(f"✅ Wrote {sum(written.values())} puzzles: {written}")
@@ -3,32 +3,90 @@ Puzzle Cache System for Fast Game Loading
 Pre-generates and caches Sudoku puzzles to eliminate generation delays
 """
 
-import json
+import multiprocessing
 import os
 import threading
 import time
-from typing import List, Tuple, Dict
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Tuple, Dict, List, Optional
 from collections import deque
+from board import FrozenBoard, response_body
+from cache_store import PuzzleStore
+from puzzle_bank import PuzzleBank
+from refill_scheduler import RefillScheduler
+from result_cache import seed_solution
+from symmetry import derive
 from Sudoko_backend import SudokuGame
 
-Grid = List[List[int]]
+Puzzle = Tuple[FrozenBoard, FrozenBoard]
+# Pool entry: (puzzle, solution, /api/generate response body)
+CachedPuzzle = Tuple[FrozenBoard, FrozenBoard, bytes]
+
+
+def _entry(difficulty: str, puzzle: FrozenBoard, solution: FrozenBoard) -> CachedPuzzle:
+    """Pool entry; puzzles never change once generated, so the body is encoded once."""
+    return puzzle, solution, response_body(difficulty, puzzle, solution)
+
+
+def _generate_packed(difficulties: Tuple[str, ...], deadline: Optional[float] = None,
+                     max_nodes: Optional[int] = None,
+                     retries: int = 0) -> Tuple[Dict[str, Tuple[bytes, bytes]], float, Optional[str], dict]:
+    """
+    Worker entry point: generate puzzles for the given difficulties (one
+    carving run when there are several) within the given budget. Tiers that
+    did not reach their hole count are left out rather than served short.
+    Returns raw cells, seconds spent, the abort reason (None on success)
+    and the carving stats.
+    """
+    t0 = time.perf_counter()
+    game = SudokuGame()
+    games = game.new_games(list(difficulties), deadline, max_nodes, retries, best_effort=False)
+    packed = {diff: (puzzle.cells, solution.cells) for diff, (puzzle, solution) in games.items()}
+    return packed, time.perf_counter() - t0, game.abort_reason, game.last_stats.as_dict()
+
 
 class PuzzleCache:
     """
     Maintains a pool of pre-generated puzzles for each difficulty level.
-    Automatically refills the pool in the background.
+    Automatically refills the pools in the background, sized by observed demand.
     """
     
-    def __init__(self, pool_size: int = 10, cache_file: str = "puzzle_cache.json"):
+    def __init__(self, pool_size: int = 10, cache_file: str = "puzzle_cache.log",
+                 workers: Optional[int] = None, bank_file: str = "puzzle_bank.bin",
+                 legacy_cache_file: str = "puzzle_cache.json", derive_per_seed: int = 8,
+                 multi_tier: bool = True, gen_deadline: Optional[float] = 10.0,
+                 gen_max_nodes: Optional[int] = 50_000, gen_retries: int = 3):
         """
         Initialize the puzzle cache.
         
         Args:
-            pool_size: Number of puzzles to keep cached per difficulty
-            cache_file: Path to persistent cache file
+            pool_size: Maximum number of puzzles cached per difficulty
+            cache_file: Path to the append-only persistent cache log
+            workers: Generator processes (defaults to one per core);
+                     0 generates on a single background thread instead
+            bank_file: Optional memory-mapped puzzle bank served before the pools
+            legacy_cache_file: Old JSON cache imported when no log exists yet
+            derive_per_seed: Symmetry-derived puzzles that may be minted from each
+                             served puzzle when a pool is empty (0 disables)
+            multi_tier: Carve each board once and snapshot a puzzle for every
+                        difficulty on the way, refilling all pools per job
+            gen_deadline: Seconds one generation job may take (None = no limit)
+            gen_max_nodes: Search nodes each board may use (its own
+                           SearchBudget) before the job starts over with a
+                           new board (None = no limit)
+            gen_retries: New boards a job may try before giving up; pools
+                         never take short puzzles, so the job is re-dispatched
         """
         self.pool_size = pool_size
         self.cache_file = cache_file
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.multi_tier = multi_tier
+        self.gen_budget = (gen_deadline, gen_max_nodes, gen_retries)
+        self.aborted_count: Dict[str, int] = {}  # abort reason -> jobs
+        self.generation_totals: Dict[str, int] = {
+            "jobs": 0, "attempts": 0, "restarts": 0, "uniqueness_checks": 0,
+        }
         self.difficulties = ["easy", "medium", "hard", "expert"]
         
         # In-memory puzzle pools (FIFO queues)
@@ -39,9 +97,36 @@ class PuzzleCache:
         # Lock for thread-safe access
         self.lock = threading.Lock()
         
-        # Background generation thread
+        # Requests waiting on a cache miss, served FIFO as puzzles finish
+        self.waiters: Dict[str, deque] = {diff: deque() for diff in self.difficulties}
+        
+        # Served puzzles kept as seeds for symmetry-derived variants:
+        # [puzzle, solution, derivations left]
+        self.derive_per_seed = derive_per_seed
+        self.seeds: Dict[str, deque] = {
+            diff: deque(maxlen=pool_size) for diff in self.difficulties
+        }
+        self.derived_count: Dict[str, int] = {diff: 0 for diff in self.difficulties}
+        
+        # Append-only persistence: only new puzzles and consumptions hit disk
+        self.store = PuzzleStore(cache_file, legacy_json=legacy_cache_file)
+        
+        # Generation backend: a process pool keeps CPU-bound carving off the
+        # API process's GIL; workers=0 falls back to one in-process thread
+        self.executor: Executor = self._create_executor()
+        
+        # Background generation thread (dispatches jobs to the executor).
+        # get_puzzle and finished jobs set `wakeup` instead of the thread polling.
         self.generation_thread = None
         self.should_stop = False
+        self.wakeup = threading.Event()
+        self.scheduler = RefillScheduler(
+            self.difficulties, max_pool=pool_size, min_pool=max(1, pool_size // 5),
+            workers=max(self.workers, 1),
+        )
+        
+        # Pre-generated puzzle bank (None if no bank file is deployed)
+        self.bank: Optional[PuzzleBank] = PuzzleBank.open(bank_file)
         
         # Load cached puzzles from disk
         self._load_cache()
@@ -51,78 +136,167 @@ class PuzzleCache:
     
     def _load_cache(self):
         """Load cached puzzles from disk if available."""
-        if not os.path.exists(self.cache_file):
-            return
-        
         try:
-            with open(self.cache_file, 'r') as f:
-                data = json.load(f)
+            stored, needs_compaction = self.store.load(self.difficulties)
+            entries = {
+                diff: [_entry(diff, puzzle, solution) for puzzle, solution in stored.get(diff, [])[:self.pool_size]]
+                for diff in self.difficulties
+            }
             
             with self.lock:
                 for diff in self.difficulties:
-                    if diff in data:
-                        puzzles = data[diff]
-                        for item in puzzles[:self.pool_size]:
-                            self.pools[diff].append((item['puzzle'], item['solution']))
+                    puzzles = stored.get(diff, [])
+                    self.pools[diff].extend(entries[diff])
+                    if len(puzzles) > self.pool_size:
+                        needs_compaction = True
+            
+            if needs_compaction:
+                self.store.compact(self._snapshot_pools)
             
             print(f"✅ Loaded {sum(len(pool) for pool in self.pools.values())} cached puzzles from disk")
         except Exception as e:
             print(f"⚠️ Failed to load puzzle cache: {e}")
     
+    def _snapshot_pools(self) -> Dict[str, list]:
+        """Copy the pools and reset the store's buffer in one critical section."""
+        with self.lock:
+            snapshot = {diff: [entry[:2] for entry in self.pools[diff]] for diff in self.difficulties}
+            self.store.discard_pending(sum(len(items) for items in snapshot.values()))
+        return snapshot
+    
+    def _waiting(self, difficulty: str) -> int:
+        """Live (not cancelled) queued requests. Caller must hold self.lock."""
+        return sum(1 for waiter in self.waiters[difficulty] if not waiter.cancelled())
+    
+    def _add_to_pool(self, difficulty: str, entry: CachedPuzzle) -> bool:
+        """
+        Hand a puzzle to the oldest waiting request, or else append it to the
+        pool and log it. A full pool keeps its older puzzles and the new one
+        is dropped. Returns False if dropped. Caller must hold self.lock.
+        """
+        waiters = self.waiters[difficulty]
+        while waiters:
+            waiter = waiters.popleft()
+            if waiter.set_running_or_notify_cancel():
+                waiter.set_result(entry)
+                return True
+        
+        pool = self.pools[difficulty]
+        if len(pool) >= self.pool_size:
+            return False
+        pool.append(entry)
+        self.store.record_added(difficulty, entry[0], entry[1])
+        return True
+    
+    def _collect(self, future: Future, job: Tuple[str, ...]) -> Dict[str, bool]:
+        """Move a finished job's puzzles into the pools; returns what was kept."""
+        games, seconds, reason, stats = future.result()
+        for diff in job:
+            self.scheduler.record_generation(diff, seconds / len(job))
+        with self.lock:
+            totals = self.generation_totals
+            totals["jobs"] += 1
+            for key in ("attempts", "restarts", "uniqueness_checks"):
+                totals[key] += stats[key]
+            if reason is not None:
+                self.aborted_count[reason] = self.aborted_count.get(reason, 0) + 1
+        if reason is not None:
+            missing = [diff for diff in job if diff not in games]
+            print(f"⚠️ Generation aborted ({reason}) after {seconds:.2f}s; "
+                  f"no puzzle for {', '.join(missing) or 'none'}")
+        kept = {}
+        for diff, (puzzle, solution) in games.items():
+            entry = _entry(diff, FrozenBoard(puzzle), FrozenBoard(solution))  # encoded outside the lock
+            with self.lock:
+                kept[diff] = self._add_to_pool(diff, entry)
+        return kept
+    
     def _save_cache(self):
-        """Save current puzzle pools to disk."""
+        """Append pool changes since the last save; writes nothing if unchanged."""
         try:
-            data = {}
-            with self.lock:
-                for diff in self.difficulties:
-                    data[diff] = [
-                        {"puzzle": puzzle, "solution": solution}
-                        for puzzle, solution in list(self.pools[diff])
-                    ]
+            written = self.store.flush()
+            if self.store.needs_compaction():
+                self.store.compact(self._snapshot_pools)
             
-            with open(self.cache_file, 'w') as f:
-                json.dump(data, f)
+            if self.bank is not None:
+                self.bank.save_cursors()
             
-            print(f"💾 Saved {sum(len(pool) for pool in self.pools.values())} puzzles to cache")
+            if written:
+                print(f"💾 Logged {written} cache changes ({sum(len(pool) for pool in self.pools.values())} puzzles cached)")
         except Exception as e:
             print(f"⚠️ Failed to save puzzle cache: {e}")
     
-    def _generate_puzzle(self, difficulty: str) -> Tuple[Grid, Grid]:
-        """Generate a single puzzle for the given difficulty."""
-        game = SudokuGame()
-        puzzle, solution = game.new_game(difficulty)
-        return puzzle, solution
+    def _create_executor(self) -> Executor:
+        """Create the process pool (or a single thread when workers == 0)."""
+        if self.workers <= 0:
+            return ThreadPoolExecutor(max_workers=1)
+        # spawn: forking a process that already runs threads is unsafe
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    
+    def _job_for(self, difficulty: str) -> Tuple[str, ...]:
+        """Difficulties one generation job produces when `difficulty` is needed."""
+        return tuple(self.difficulties) if self.multi_tier else (difficulty,)
+    
+    def _submit(self, difficulties: Tuple[str, ...]) -> Future:
+        """Queue one generation job on the executor."""
+        try:
+            return self.executor.submit(_generate_packed, difficulties, *self.gen_budget)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); replace the pool and retry once
+            print("⚠️ Generator pool broken, restarting workers")
+            self.executor = self._create_executor()
+            return self.executor.submit(_generate_packed, difficulties, *self.gen_budget)
     
     def _background_generator(self):
         """Background thread that keeps puzzle pools filled."""
-        print("🔄 Background puzzle generator started")
+        print(f"🔄 Background puzzle generator started ({max(self.workers, 1)} workers)")
+        
+        in_flight: Dict[Future, Tuple[str, ...]] = {}
+        capacity = max(self.workers, 1)
         
         while not self.should_stop:
-            # Check each difficulty pool and refill if needed
-            for diff in self.difficulties:
-                if self.should_stop:
+            # Clear first so a wakeup arriving during this pass is not lost
+            self.wakeup.clear()
+            
+            # Stream finished puzzles back into the pools as they complete
+            for future in [f for f in in_flight if f.done()]:
+                job = in_flight.pop(future)
+                try:
+                    kept = self._collect(future, job)
+                    added = ", ".join(f"{diff} {len(self.pools[diff])}/{self.scheduler.target(diff)}"
+                                      for diff, ok in kept.items() if ok)
+                    print(f"✨ Generated puzzles ({added or 'pools already full'})")
+                except Exception as e:
+                    print(f"❌ Failed to generate {'/'.join(job)} puzzle: {e}")
+            
+            # Dispatch: the pool closest to running dry goes first, at most
+            # one job in flight per worker, until every pool meets its target.
+            # Waiting requests count as negative stock, so they jump the queue.
+            with self.lock:
+                sizes = {diff: len(self.pools[diff]) - self._waiting(diff) for diff in self.difficulties}
+            for job in in_flight.values():
+                for diff in job:
+                    sizes[diff] += 1
+            while len(in_flight) < capacity:
+                diff = self.scheduler.next_job(sizes)
+                if diff is None:
                     break
-                
-                with self.lock:
-                    current_size = len(self.pools[diff])
-                
-                # If pool is below target, generate more
-                if current_size < self.pool_size:
-                    try:
-                        puzzle, solution = self._generate_puzzle(diff)
-                        
-                        with self.lock:
-                            self.pools[diff].append((puzzle, solution))
-                        
-                        print(f"✨ Generated {diff} puzzle ({len(self.pools[diff])}/{self.pool_size})")
-                    except Exception as e:
-                        print(f"❌ Failed to generate {diff} puzzle: {e}")
+                job = self._job_for(diff)
+                future = self._submit(job)
+                future.add_done_callback(lambda _: self.wakeup.set())
+                in_flight[future] = job
+                for d in job:
+                    sizes[d] += 1
             
-            # Save cache periodically
+            # Persist changes (no-op when nothing changed)
             self._save_cache()
             
-            # Sleep briefly before next check
-            time.sleep(1)
+            # Sleep until a request pops a puzzle or a job finishes; the timeout
+            # lets decaying demand shrink targets and re-checks stop requests
+            self.wakeup.wait(timeout=5)
         
         print("🛑 Background puzzle generator stopped")
     
@@ -136,30 +310,138 @@ class PuzzleCache:
             )
             self.generation_thread.start()
     
-    def get_puzzle(self, difficulty: str) -> Tuple[Grid, Grid]:
+    def request_puzzle(self, difficulty: str) -> Future:
         """
-        Get a puzzle from the cache. If cache is empty, generate one immediately.
+        Non-blocking get. Returns a Future resolved with (puzzle, solution,
+        response body); the body is the pre-encoded /api/generate JSON.
+        
+        Bank and pool hits come back already resolved. On a miss the request
+        joins a FIFO queue for its difficulty and the background generator
+        hands it the next puzzle it finishes, so concurrent misses share the
+        generator's jobs instead of each carving their own board. Cancelling
+        the future (e.g. the client went away) gives its puzzle to the next
+        waiter or to the pool.
         
         Args:
             difficulty: Difficulty level (easy, medium, hard, expert)
-        
-        Returns:
-            Tuple of (puzzle, solution)
         """
         difficulty = difficulty.lower()
         if difficulty not in self.difficulties:
             difficulty = "medium"
         
+        self.scheduler.record_request(difficulty)
+        future: Future = Future()
+        future.add_done_callback(self._seed_result)
+        
+        # O(1) draw from the memory-mapped bank while it lasts
+        if self.bank is not None:
+            drawn = self.bank.draw(difficulty)
+            if drawn is not None:
+                future.set_result(_entry(difficulty, *drawn))
+                return future
+        
         with self.lock:
             if len(self.pools[difficulty]) > 0:
                 # Get from cache
-                puzzle, solution = self.pools[difficulty].popleft()
+                entry = self.pools[difficulty].popleft()
+                puzzle, solution, _ = entry
+                self.store.record_taken(difficulty, puzzle)
+                if self.derive_per_seed > 0:
+                    self.seeds[difficulty].append([puzzle, solution, self.derive_per_seed])
                 print(f"⚡ Served {difficulty} puzzle from cache ({len(self.pools[difficulty])} remaining)")
-                return puzzle, solution
+                future.set_result(entry)
+            elif self.seeds[difficulty]:
+                # Pool is dry: mint a variant of a recent puzzle in microseconds
+                future.set_result(_entry(difficulty, *derive(*self._next_seed(difficulty))))
+            else:
+                # Cache is empty, wait for the generator
+                print(f"⏳ Cache empty, queued {difficulty} request ({len(self.waiters[difficulty]) + 1} waiting)")
+                self.waiters[difficulty].append(future)
+        
+        self.wakeup.set()
+        return future
+    
+    def _next_seed(self, difficulty: str) -> Puzzle:
+        """
+        Spend one derivation from the seeds, round-robin. Caller must hold
+        self.lock and have checked that self.seeds[difficulty] is not empty.
+        """
+        seeds = self.seeds[difficulty]
+        seed = seeds[0]
+        seed[2] -= 1
+        if seed[2] <= 0:
+            seeds.popleft()
+        else:
+            seeds.rotate(-1)
+        self.derived_count[difficulty] += 1
+        return seed[0], seed[1]
+    
+    def take_many(self, counts: Dict[str, int]) -> Dict[str, List[CachedPuzzle]]:
+        """
+        Non-blocking batch get: up to counts[difficulty] (puzzle, solution,
+        response body) entries per difficulty. Bank records go first, then
+        every pool is popped under a single lock acquisition; a short pool is
+        topped up with symmetry variants of puzzles served by earlier calls.
+        A difficulty with no stock at all comes back short,
+        possibly empty, and is left for the generator to refill.
+        """
+        counts = {diff: n for diff, n in counts.items() if diff in self.difficulties and n > 0}
+        taken: Dict[str, List[CachedPuzzle]] = {diff: [] for diff in counts}
+        for diff, n in counts.items():
+            for _ in range(n):
+                self.scheduler.record_request(diff)
+            while self.bank is not None and len(taken[diff]) < n:
+                drawn = self.bank.draw(diff)
+                if drawn is None:
+                    break
+                taken[diff].append(_entry(diff, *drawn))
+        
+        to_derive = []  # (difficulty, seed puzzle, seed solution)
+        with self.lock:
+            for diff, n in counts.items():
+                pool = self.pools[diff]
+                popped = []
+                while pool and len(taken[diff]) < n:
+                    entry = pool.popleft()
+                    self.store.record_taken(diff, entry[0])
+                    popped.append(entry)
+                    taken[diff].append(entry)
+                for _ in range(n - len(taken[diff])):
+                    if not self.seeds[diff]:
+                        break
+                    to_derive.append((diff, *self._next_seed(diff)))
+                # Seeded only after topping up, so no batch holds a puzzle and its own variant
+                if self.derive_per_seed > 0:
+                    self.seeds[diff].extend(
+                        [puzzle, solution, self.derive_per_seed] for puzzle, solution, _ in popped
+                    )
+        
+        for diff, puzzle, solution in to_derive:
+            taken[diff].append(_entry(diff, *derive(puzzle, solution)))
+        for entries in taken.values():
+            for puzzle, solution, _ in entries:
+                seed_solution(puzzle, solution)
+        
+        print(f"⚡ Served batch ({', '.join(f'{diff} {len(entries)}' for diff, entries in taken.items())}; "
+              f"{len(to_derive)} derived)")
+        self.wakeup.set()
+        return taken
+    
+    @staticmethod
+    def _seed_result(future: Future):
+        """Pre-seed the solve result cache with a served puzzle's solution."""
+        if not future.cancelled() and future.exception() is None:
+            puzzle, solution, _ = future.result()
+            seed_solution(puzzle, solution)
+    
+    def get_puzzle(self, difficulty: str) -> Puzzle:
+        """
+        Get a puzzle from the cache, blocking until one is generated if empty.
         
-        # Cache is empty, generate immediately
-        print(f"⏳ Cache empty, generating {difficulty} puzzle...")
-        puzzle, solution = self._generate_puzzle(difficulty)
+        Returns:
+            Tuple of (puzzle, solution) as FrozenBoards
+        """
+        puzzle, solution, _ = self.request_puzzle(difficulty).result()
         return puzzle, solution
     
     def prefill_cache(self, count_per_difficulty: int = None):
@@ -176,15 +458,20 @@ class PuzzleCache:
         
         print(f"🔧 Pre-filling cache with {count_per_difficulty} puzzles per difficulty...")
         
-        for diff in self.difficulties:
-            for i in range(count_per_difficulty):
-                try:
-                    puzzle, solution = self._generate_puzzle(diff)
-                    with self.lock:
-                        self.pools[diff].append((puzzle, solution))
-                    print(f"  ✓ {diff}: {i+1}/{count_per_difficulty}")
-                except Exception as e:
-                    print(f"  ✗ {diff}: Failed - {e}")
+        # Submit everything up front so all workers carve in parallel; in
+        # multi-tier mode one job yields a puzzle for every difficulty
+        if self.multi_tier:
+            batches = [tuple(self.difficulties)] * count_per_difficulty
+        else:
+            batches = [(diff,) for diff in self.difficulties for _ in range(count_per_difficulty)]
+        jobs = [(self._submit(job), job) for job in batches]
+        
+        for i, (future, job) in enumerate(jobs):
+            try:
+                kept = self._collect(future, job)
+                print(f"  ✓ {i+1}/{len(jobs)}: {', '.join(kept)}")
+            except Exception as e:
+                print(f"  ✗ {i+1}/{len(jobs)}: Failed - {e}")
         
         self._save_cache()
         print("✅ Cache pre-fill complete!")
@@ -198,9 +485,19 @@ class PuzzleCache:
         """Gracefully shutdown the cache system."""
         print("🛑 Shutting down puzzle cache...")
         self.should_stop = True
+        self.wakeup.set()
         if self.generation_thread:
             self.generation_thread.join(timeout=5)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        with self.lock:
+            for waiters in self.waiters.values():
+                while waiters:
+                    waiter = waiters.popleft()
+                    if waiter.set_running_or_notify_cancel():
+                        waiter.set_exception(RuntimeError("puzzle cache is shutting down"))
         self._save_cache()
+        if self.bank is not None:
+            self.bank.close()
         print("✅ Puzzle cache shutdown complete")
 
 
@@ -0,0 +1,95 @@
+"""
+Demand-Driven Refill Scheduler
+Tracks per-difficulty request rates and generation cost with EWMAs, sizes each
+pool from observed demand, and picks the pool closest to running dry.
+"""
+
+import math
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+
+class RefillScheduler:
+    """
+    Request rate is an exponentially decayed event count (events/second) with
+    the given half-life; generation cost is an EWMA of seconds per puzzle.
+    """
+
+    def __init__(self, difficulties: Iterable[str], max_pool: int, min_pool: int = 1,
+                 workers: int = 1, half_life: float = 30.0, cost_alpha: float = 0.2,
+                 initial_cost: float = 0.05, safety: float = 2.0):
+        self.difficulties = list(difficulties)
+        self.max_pool = max_pool
+        self.min_pool = min(min_pool, max_pool)
+        self.workers = max(workers, 1)
+        self.tau = half_life / math.log(2)
+        self.cost_alpha = cost_alpha
+        self.safety = safety
+        self.lock = threading.Lock()
+
+        self._rate: Dict[str, float] = {d: 0.0 for d in self.difficulties}
+        self._last: Dict[str, float] = {d: time.monotonic() for d in self.difficulties}
+        self._cost: Dict[str, float] = {d: initial_cost for d in self.difficulties}
+
+    # ---- Observations ----
+    def record_request(self, difficulty: str, now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            decay = math.exp(-(now - self._last[difficulty]) / self.tau)
+            self._rate[difficulty] = self._rate[difficulty] * decay + 1.0 / self.tau
+            self._last[difficulty] = now
+
+    def record_generation(self, difficulty: str, seconds: float):
+        with self.lock:
+            a = self.cost_alpha
+            self._cost[difficulty] = (1 - a) * self._cost[difficulty] + a * seconds
+
+    # ---- Estimates ----
+    def rate(self, difficulty: str, now: Optional[float] = None) -> float:
+        """Current request rate estimate in requests/second."""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            return self._rate[difficulty] * math.exp(-(now - self._last[difficulty]) / self.tau)
+
+    def target(self, difficulty: str, now: Optional[float] = None) -> int:
+        """
+        Pool size that covers expected demand while a replacement is carved:
+        lead time is one round of jobs across all difficulties on the workers.
+        """
+        rate = self.rate(difficulty, now)
+        with self.lock:
+            lead_time = sum(self._cost.values()) / self.workers + self._cost[difficulty]
+        wanted = self.min_pool + math.ceil(rate * lead_time * self.safety)
+        return max(self.min_pool, min(self.max_pool, wanted))
+
+    def next_job(self, sizes: Dict[str, int], now: Optional[float] = None) -> Optional[str]:
+        """
+        Pick the difficulty to generate next, or None if every pool (counting
+        in-flight jobs in `sizes`) has reached its target. The pool with the
+        shortest expected time to empty wins; idle pools order by fill ratio.
+        """
+        now = time.monotonic() if now is None else now
+        best, best_key = None, None
+        for diff in self.difficulties:
+            target = self.target(diff, now)
+            size = sizes.get(diff, 0)
+            if size >= target:
+                continue
+            rate = self.rate(diff, now)
+            time_to_empty = size / rate if rate > 1e-9 else math.inf
+            key = (time_to_empty, size / target)
+            if best_key is None or key < best_key:
+                best, best_key = diff, key
+        return best
+
+    def stats(self) -> Dict[str, dict]:
+        now = time.monotonic()
+        return {
+            diff: {
+                "requests_per_min": round(self.rate(diff, now) * 60, 2),
+                "target": self.target(diff, now),
+                "cost_ms": round(self._cost[diff] * 1000, 1),
+            }
+            for diff in self.difficulties
+        }
@@ -0,0 +1,92 @@
+"""
+Solver Result Cache
+Bounded, thread-safe LRU with TTL in front of /api/solve and /api/stepwise-path.
+Keys are 16-byte BLAKE2b digests of the board cells, so an entry costs the
+same whatever the request looked like on the wire.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from board import FrozenBoard
+from logic_solver import LogicStep
+
+
+def board_key(*boards) -> bytes:
+    """Digest of one or more boards' cells (e.g. grid, or grid + solution)."""
+    h = hashlib.blake2b(digest_size=16)
+    for board in boards:
+        h.update(board.cells)
+    return h.digest()
+
+
+class ResultCache:
+    """
+    LRU keyed by board_key(). Entries older than `ttl` seconds are treated as
+    misses and dropped; the least recently used entry goes once `maxsize` is hit.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = 3600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()  # key -> (stored_at, value)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: bytes) -> Optional[Any]:
+        now = time.monotonic()
+        with self.lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and now - entry[0] > self.ttl:
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: bytes, value: Any):
+        with self.lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+# Process-wide caches: puzzle -> solution, and (grid, solution) -> logical path
+solve_cache = ResultCache(maxsize=4096)
+path_cache = ResultCache(maxsize=1024)
+
+
+def seed_solution(puzzle: FrozenBoard, solution: FrozenBoard):
+    """Record a known solution so the first /api/solve for `puzzle` is a hit."""
+    solve_cache.put(board_key(puzzle), solution)
+
+
+def cached_path(grid, solution) -> Optional[Tuple[LogicStep, ...]]:
+    return path_cache.get(board_key(grid, solution))
+
+
+def store_path(grid, solution, steps: Tuple[LogicStep, ...]):
+    path_cache.put(board_key(grid, solution), steps)
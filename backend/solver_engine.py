@@ -0,0 +1,390 @@
+"""
+Bitmask Constraint Engine
+Row, column and box occupancy kept as 9-bit masks, with MRV cell selection.
+"""
+
+import time
+from typing import Callable, List, Optional, Tuple
+
+from board import Board
+
+Move = Tuple[int, int, int]
+
+# =========================================
+# Precomputed Tables
+# =========================================
+ALL_DIGITS = 0x1FF  # bits 0..8 -> digits 1..9
+
+ROW_OF = [i // 9 for i in range(81)]
+COL_OF = [i % 9 for i in range(81)]
+BOX_OF = [(i // 27) * 3 + (i % 9) // 3 for i in range(81)]
+
+# The 27 units: rows 0-8, columns 9-17, boxes 18-26
+UNITS: List[Tuple[int, ...]] = (
+    [tuple(r * 9 + c for c in range(9)) for r in range(9)]
+    + [tuple(r * 9 + c for r in range(9)) for c in range(9)]
+    + [tuple(br * 27 + bc * 3 + (k // 3) * 9 + k % 3 for k in range(9))
+       for br in range(3) for bc in range(3)]
+)
+
+# The 20 cells sharing a row, column or box with each cell
+PEERS: List[Tuple[int, ...]] = [
+    tuple(sorted(
+        {j for j in range(81)
+         if j != i and (ROW_OF[j] == ROW_OF[i] or COL_OF[j] == COL_OF[i] or BOX_OF[j] == BOX_OF[i])}
+    ))
+    for i in range(81)
+]
+
+BIT = [0] + [1 << (n - 1) for n in range(1, 10)]
+DIGIT_OF_BIT = {1 << (n - 1): n for n in range(1, 10)}
+POPCOUNT = [bin(m).count("1") for m in range(512)]
+DIGITS_IN = [tuple(n for n in range(1, 10) if m & BIT[n]) for m in range(512)]
+
+
+# =========================================
+# Search Budgets
+# =========================================
+class BudgetExceeded(Exception):
+    """Raised inside a search when its SearchBudget runs out; `reason` says which limit."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class SearchBudget:
+    """
+    Wall-clock deadline and/or search-node limit shared by every search it is
+    passed to. Each search node calls spend(); the clock is only read every
+    `check_every` nodes to keep the per-node cost to a counter increment.
+    """
+    __slots__ = ("deadline", "max_nodes", "nodes", "check_every", "_next_check")
+
+    def __init__(self, deadline: Optional[float] = None, max_nodes: Optional[int] = None,
+                 check_every: int = 64):
+        self.deadline = deadline      # time.monotonic() value, or None
+        self.max_nodes = max_nodes
+        self.nodes = 0
+        self.check_every = check_every
+        self._next_check = check_every
+
+    def spend(self, nodes: int = 1):
+        self.nodes += nodes
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise BudgetExceeded("node_budget")
+        if self.nodes >= self._next_check:
+            self._next_check = self.nodes + self.check_every
+            self.check_deadline()
+
+    def check_deadline(self):
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise BudgetExceeded("deadline")
+
+
+# =========================================
+# Constraint State
+# =========================================
+class ConstraintState:
+    """
+    Flat 81-cell board plus row/column/box occupancy masks.
+    Placing or clearing a digit is O(1); candidates are a single mask lookup.
+    """
+    __slots__ = ("cells", "rows", "cols", "boxes")
+
+    def __init__(self):
+        self.cells: List[int] = [0] * 81
+        self.rows: List[int] = [0] * 9
+        self.cols: List[int] = [0] * 9
+        self.boxes: List[int] = [0] * 9
+
+    @classmethod
+    def from_board(cls, board: Board) -> Optional["ConstraintState"]:
+        """Build a state from a Board/FrozenBoard. Returns None if the givens conflict."""
+        state = cls()
+        for i, n in enumerate(board.cells):
+            if n:
+                if not state.candidates(i) & BIT[n]:
+                    return None
+                state.place(i, n)
+        return state
+
+    def copy(self) -> "ConstraintState":
+        other = ConstraintState.__new__(ConstraintState)
+        other.cells = self.cells[:]
+        other.rows = self.rows[:]
+        other.cols = self.cols[:]
+        other.boxes = self.boxes[:]
+        return other
+
+    def candidates(self, i: int) -> int:
+        return ALL_DIGITS & ~(self.rows[ROW_OF[i]] | self.cols[COL_OF[i]] | self.boxes[BOX_OF[i]])
+
+    def place(self, i: int, n: int):
+        bit = BIT[n]
+        self.cells[i] = n
+        self.rows[ROW_OF[i]] |= bit
+        self.cols[COL_OF[i]] |= bit
+        self.boxes[BOX_OF[i]] |= bit
+
+    def clear(self, i: int):
+        bit = BIT[self.cells[i]]
+        self.cells[i] = 0
+        self.rows[ROW_OF[i]] &= ~bit
+        self.cols[COL_OF[i]] &= ~bit
+        self.boxes[BOX_OF[i]] &= ~bit
+
+    def pick_cell(self) -> Tuple[int, int]:
+        """
+        MRV selection: return (index, candidate mask) of the empty cell with the
+        fewest candidates, or (-1, 0) when the board is full.
+        """
+        cells, rows, cols, boxes = self.cells, self.rows, self.cols, self.boxes
+        best, best_mask, best_count = -1, 0, 10
+        for i in range(81):
+            if cells[i] == 0:
+                m = ALL_DIGITS & ~(rows[ROW_OF[i]] | cols[COL_OF[i]] | boxes[BOX_OF[i]])
+                k = POPCOUNT[m]
+                if k < best_count:
+                    best, best_mask, best_count = i, m, k
+                    if k <= 1:
+                        break
+        return best, best_mask
+
+    def to_board(self) -> Board:
+        return Board(self.cells)
+
+    def write_to(self, board: Board):
+        """Copy the cell values back into an existing Board in place."""
+        board.cells[:] = bytes(self.cells)
+
+
+# =========================================
+# Propagation (naked + hidden singles)
+# =========================================
+def propagate(state: ConstraintState, trail: List[int]) -> bool:
+    """
+    Repeatedly place naked singles and hidden singles until nothing changes.
+    Every placed index is appended to `trail` so callers can roll back with
+    undo_to(). Returns False as soon as a contradiction is found.
+    """
+    cells = state.cells
+    rows, cols, boxes = state.rows, state.cols, state.boxes
+    while True:
+        progress = False
+
+        # Naked singles: a cell with exactly one candidate
+        for i in range(81):
+            if cells[i] == 0:
+                m = ALL_DIGITS & ~(rows[ROW_OF[i]] | cols[COL_OF[i]] | boxes[BOX_OF[i]])
+                if not m:
+                    return False
+                if not m & (m - 1):
+                    state.place(i, DIGIT_OF_BIT[m])
+                    trail.append(i)
+                    progress = True
+
+        # Hidden singles: a digit with exactly one home in a unit
+        for unit in UNITS:
+            once = twice = placed = 0
+            for i in unit:
+                n = cells[i]
+                if n:
+                    placed |= BIT[n]
+                    continue
+                m = ALL_DIGITS & ~(rows[ROW_OF[i]] | cols[COL_OF[i]] | boxes[BOX_OF[i]])
+                twice |= once & m
+                once |= m
+            if (once | placed) != ALL_DIGITS:
+                return False
+            singles = once & ~twice & ~placed
+            if not singles:
+                continue
+            for i in unit:
+                if cells[i] == 0:
+                    m = state.candidates(i) & singles
+                    if m:
+                        if m & (m - 1):
+                            return False
+                        state.place(i, DIGIT_OF_BIT[m])
+                        trail.append(i)
+                        progress = True
+
+        if not progress:
+            return True
+
+
+def undo_to(state: ConstraintState, trail: List[int], mark: int = 0):
+    """Clear cells placed since `trail` had length `mark`."""
+    while len(trail) > mark:
+        state.clear(trail.pop())
+
+
+# =========================================
+# Search
+# =========================================
+def _record(state: ConstraintState, trail: List[int], moves: List[Move]):
+    for i in trail:
+        moves.append((ROW_OF[i], COL_OF[i], state.cells[i]))
+
+
+def _rollback(state: ConstraintState, trail: List[int], moves: Optional[List[Move]]):
+    while trail:
+        i = trail.pop()
+        state.clear(i)
+        if moves is not None:
+            moves.append((ROW_OF[i], COL_OF[i], 0))
+
+
+def search(state: ConstraintState, moves: Optional[List[Move]] = None,
+           shuffle: Optional[Callable[[list], None]] = None) -> bool:
+    """
+    Propagate, then branch on the MRV cell. On success the state is left solved.
+    If `moves` is given, every placement (r, c, n) and undo (r, c, 0) is appended.
+    If `shuffle` is given (e.g. random.shuffle), digits are tried in random order.
+    """
+    trail: List[int] = []
+    consistent = propagate(state, trail)
+    if moves is not None:
+        _record(state, trail, moves)
+    if not consistent:
+        _rollback(state, trail, moves)
+        return False
+
+    i, mask = state.pick_cell()
+    if i < 0:
+        return True
+    r, c = ROW_OF[i], COL_OF[i]
+    digits = DIGITS_IN[mask]
+    if shuffle is not None:
+        digits = list(digits)
+        shuffle(digits)
+    for n in digits:
+        state.place(i, n)
+        if moves is not None:
+            moves.append((r, c, n))
+        if search(state, moves, shuffle):
+            return True
+        state.clear(i)
+        if moves is not None:
+            moves.append((r, c, 0))
+    _rollback(state, trail, moves)
+    return False
+
+
+def count(state: ConstraintState, limit: int = 2, budget: Optional[SearchBudget] = None) -> int:
+    """
+    Count solutions up to `limit`. The state is restored before returning,
+    including when `budget` runs out and BudgetExceeded propagates.
+    """
+    if budget is not None:
+        budget.spend()
+    trail: List[int] = []
+    found = 0
+    try:
+        if propagate(state, trail):
+            i, mask = state.pick_cell()
+            if i < 0:
+                found = 1
+            else:
+                for n in DIGITS_IN[mask]:
+                    state.place(i, n)
+                    try:
+                        found += count(state, limit - found, budget)
+                    finally:
+                        state.clear(i)
+                    if found >= limit:
+                        break
+    finally:
+        undo_to(state, trail)
+    return found
+
+
+def has_alternative(state: ConstraintState, i: int, n: int,
+                    budget: Optional[SearchBudget] = None) -> bool:
+    """
+    True if some completion of the state puts a digit other than `n` in the
+    empty cell `i`. The state is restored before returning.
+    """
+    for d in DIGITS_IN[state.candidates(i) & ~BIT[n]]:
+        state.place(i, d)
+        try:
+            found = count(state, 1, budget)
+        finally:
+            state.clear(i)
+        if found:
+            return True
+    return False
+
+
+def solve_board(board: Board, moves: Optional[List[Move]] = None,
+                shuffle: Optional[Callable[[list], None]] = None) -> bool:
+    """
+    Solve a Board in place (0 = empty). Returns False if the givens
+    conflict or no solution exists, leaving the board untouched.
+    """
+    state = ConstraintState.from_board(board)
+    if state is None:
+        return False
+    if not search(state, moves, shuffle):
+        return False
+    state.write_to(board)
+    return True
+
+
+def count_board(board: Board, limit: int = 2, budget: Optional[SearchBudget] = None) -> int:
+    """
+    Count solutions of a board up to `limit`; conflicting givens yield 0.
+    Raises BudgetExceeded if `budget` runs out first.
+    """
+    state = ConstraintState.from_board(board)
+    if state is None:
+        return 0
+    return count(state, limit, budget)
+
+
+# =========================================
+# Board Analysis
+# =========================================
+def analyze_board(board: Board) -> dict:
+    """
+    One pass over a (possibly inconsistent) board: a 9-bit candidate mask per
+    cell (bit k = digit k + 1, 0 for filled cells), every pair of cells
+    holding the same digit in a shared unit, and fill counts per row, column
+    and box. Candidate masks exclude every placed digit, conflicting or not.
+    """
+    rows, cols, boxes = [0] * 9, [0] * 9, [0] * 9
+    row_counts, col_counts, box_counts = [0] * 9, [0] * 9, [0] * 9
+    seen_in_unit = {}  # (unit index, digit) -> cells seen so far
+    conflicts = set()
+    cells = board.cells
+    for i, n in enumerate(cells):
+        if not n:
+            continue
+        r, c, b = ROW_OF[i], COL_OF[i], BOX_OF[i]
+        bit = BIT[n]
+        if (rows[r] | cols[c] | boxes[b]) & bit:
+            for unit in (r, 9 + c, 18 + b):
+                for j in seen_in_unit.get((unit, n), ()):
+                    conflicts.add((j, i))
+        for unit in (r, 9 + c, 18 + b):
+            seen_in_unit.setdefault((unit, n), []).append(i)
+        rows[r] |= bit
+        cols[c] |= bit
+        boxes[b] |= bit
+        row_counts[r] += 1
+        col_counts[c] += 1
+        box_counts[b] += 1
+
+    candidates = [
+        0 if n else ALL_DIGITS & ~(rows[ROW_OF[i]] | cols[COL_OF[i]] | boxes[BOX_OF[i]])
+        for i, n in enumerate(cells)
+    ]
+    return {
+        "candidates": candidates,
+        "conflicts": sorted(conflicts),
+        "row_counts": row_counts,
+        "col_counts": col_counts,
+        "box_counts": box_counts,
+        "empty_count": cells.count(0),
+    }
@@ -0,0 +1,128 @@
+"""
+Packed Step Encoding
+Binary form of a stepwise path for clients that send
+Accept: application/x-sudoku-steps (JSON stays the default).
+
+Layout (little-endian):
+    header   20 bytes: b"SDKS", u8 version, u8 flags, u8 encoding, pad,
+             u16 step count, u16 total steps, u16 guesses, u16 offset,
+             u32 solve time in microseconds
+             flags: bit 0 = success, bit 1 = more pages follow (next offset
+             is offset + step count)
+    body     encoding 0 ("packed"): one u16 per step,
+                 bits 0-3 value, bits 4-10 cell index (r*9 + c), bits 11-14 technique
+             encoding 1 ("delta"): per step, the cell index change from the
+                 previous step as a zigzag varint, then one byte
+                 value | technique << 4
+Technique ids are positions in logic_solver.TECHNIQUES.
+"""
+
+import struct
+from typing import Iterable, List, Tuple
+
+from logic_solver import TECHNIQUES, LogicStep
+
+MEDIA_TYPE = "application/x-sudoku-steps"
+MAGIC = b"SDKS"
+VERSION = 1
+ENCODINGS = ("packed", "delta")
+
+FLAG_SUCCESS = 1
+FLAG_MORE = 2
+
+_HEADER = struct.Struct("<4sBBBxHHHHI")
+_TECHNIQUE_ID = {name: k for k, name in enumerate(TECHNIQUES)}
+
+
+def _pack_records(steps: Iterable[LogicStep]) -> bytes:
+    words = [
+        v | (r * 9 + c) << 4 | _TECHNIQUE_ID[technique] << 11
+        for r, c, v, technique in steps
+    ]
+    return struct.pack(f"<{len(words)}H", *words)
+
+
+def _delta_records(steps: Iterable[LogicStep]) -> bytes:
+    out = bytearray()
+    prev = 0
+    for r, c, v, technique in steps:
+        i = r * 9 + c
+        delta = i - prev
+        prev = i
+        z = (delta << 1) ^ (delta >> 31)  # zigzag: small +/- deltas -> small ints
+        while z >= 0x80:
+            out.append(z & 0x7F | 0x80)
+            z >>= 7
+        out.append(z)
+        out.append(v | _TECHNIQUE_ID[technique] << 4)
+    return bytes(out)
+
+
+def encode_steps(steps: List[LogicStep], success: bool = True, total: int = 0,
+                 offset: int = 0, more: bool = False, elapsed: float = 0.0,
+                 encoding: str = "packed") -> bytes:
+    """Serialize a page of (row, col, value, technique) steps with its header."""
+    flags = (FLAG_SUCCESS if success else 0) | (FLAG_MORE if more else 0)
+    guesses = sum(1 for step in steps if step[3] == "guess")
+    header = _HEADER.pack(
+        MAGIC, VERSION, flags, ENCODINGS.index(encoding),
+        len(steps), total, guesses, offset, min(int(elapsed * 1e6), 0xFFFFFFFF),
+    )
+    body = _delta_records(steps) if encoding == "delta" else _pack_records(steps)
+    return header + body
+
+
+def decode_steps(data: bytes) -> Tuple[dict, List[LogicStep]]:
+    """Inverse of encode_steps(); returns (header fields, steps)."""
+    magic, version, flags, encoding, count, total, guesses, offset, elapsed_us = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a packed step trace")
+    steps: List[LogicStep] = []
+    pos = _HEADER.size
+    if encoding == 0:
+        for word in struct.unpack_from(f"<{count}H", data, pos):
+            i = word >> 4 & 0x7F
+            steps.append((i // 9, i % 9, word & 0xF, TECHNIQUES[word >> 11]))
+    else:
+        i = 0
+        for _ in range(count):
+            z = shift = 0
+            while True:
+                byte = data[pos]
+                pos += 1
+                z |= (byte & 0x7F) << shift
+                shift += 7
+                if byte < 0x80:
+                    break
+            i += (z >> 1) ^ -(z & 1)
+            packed = data[pos]
+            pos += 1
+            steps.append((i // 9, i % 9, packed & 0xF, TECHNIQUES[packed >> 4]))
+    header = {
+        "success": bool(flags & FLAG_SUCCESS),
+        "next_offset": offset + count if flags & FLAG_MORE else None,
+        "encoding": ENCODINGS[encoding],
+        "steps": count,
+        "total_steps": total,
+        "guesses": guesses,
+        "offset": offset,
+        "elapsed_us": elapsed_us,
+    }
+    return header, steps
+
+
+def accepts_packed(accept: str) -> Tuple[bool, str]:
+    """
+    Parse an Accept header. Returns (wants packed steps, encoding); the
+    encoding comes from an optional ";encoding=delta" media type parameter.
+    """
+    for part in accept.split(","):
+        fields = [f.strip() for f in part.split(";")]
+        if fields[0].lower() == MEDIA_TYPE:
+            encoding = "packed"
+            for param in fields[1:]:
+                key, _, value = param.partition("=")
+                if key.strip().lower() == "encoding" and value.strip().lower() in ENCODINGS:
+                    encoding = value.strip().lower()
+            return True, encoding
+    return False, "packed"
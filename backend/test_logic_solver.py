@@ -0,0 +1,64 @@
+from board import Board
+from logic_solver import TECHNIQUES, iter_logical_steps, solve_logically
+from solver_engine import ConstraintState
+
+PUZZLE = "800000000003600000070090200050007000000045700000100030001000068008500010090000400"
+SOLUTION = "812753649943682175675491283154237896369845721287169534521974368438526917796318452"
+
+
+def apply(board: Board, steps) -> Board:
+    board = board.copy()
+    for r, c, v, _ in steps:
+        assert board[r, c] == 0, "a step overwrote a filled cell"
+        board[r, c] = v
+    return board
+
+
+def test_solves_hard_puzzle_with_named_techniques():
+    board = Board.from_string(PUZZLE)
+    solved, steps = solve_logically(board, Board.from_string(SOLUTION))
+    assert solved
+    assert len(steps) == board.empty_count()
+    assert all(technique in TECHNIQUES for *_, technique in steps)
+    assert apply(board, steps) == Board.from_string(SOLUTION)
+
+
+def test_guess_limit_stops_the_path():
+    board = Board.from_string(PUZZLE)
+    path = iter_logical_steps(board, Board.from_string(SOLUTION), max_guesses=2)
+    steps = []
+    try:
+        while True:
+            steps.append(next(path))
+    except StopIteration as end:
+        assert end.value == "guess_limit"
+    assert 0 < len(steps) < board.empty_count()
+    assert sum(technique == "guess" for *_, technique in steps) == 2
+    assert ConstraintState.from_board(apply(board, steps)) is not None
+
+
+def test_few_holes_need_only_naked_singles():
+    board = Board.from_string(SOLUTION)
+    for i in (0, 10, 20, 40, 60, 80):
+        board[i] = 0
+    solved, steps = solve_logically(board)
+    assert solved
+    assert {technique for *_, technique in steps} == {"naked_single"}
+
+
+def test_inconsistent_solution_is_not_trusted_for_guesses():
+    board = Board.from_string(PUZZLE)
+    bogus = Board(n or 1 for n in board.cells)  # full, matches the givens, breaks every unit
+    solved, steps = solve_logically(board, bogus)
+    assert solved
+    result = apply(board, steps)
+    assert result == Board.from_string(SOLUTION)
+    assert ConstraintState.from_board(result) is not None
+
+
+def test_wrong_entry_stops_instead_of_breaking_constraints():
+    board = Board.from_string(PUZZLE)
+    board[0, 1] = 2  # a candidate there, but the solution has 1
+    solved, steps = solve_logically(board, Board.from_string(SOLUTION))
+    assert not solved
+    assert ConstraintState.from_board(apply(board, steps)) is not None
@@ -0,0 +1,54 @@
+import pytest
+
+from board import Board
+from logic_solver import solve_logically
+from step_codec import ENCODINGS, MEDIA_TYPE, accepts_packed, decode_steps, encode_steps
+
+PUZZLE = "800000000003600000070090200050007000000045700000100030001000068008500010090000400"
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+def test_round_trip_of_a_solved_path(encoding):
+    _, steps = solve_logically(Board.from_string(PUZZLE))
+    data = encode_steps(steps, success=True, total=len(steps), elapsed=0.0125, encoding=encoding)
+    header, decoded = decode_steps(data)
+    assert decoded == steps
+    assert header["encoding"] == encoding
+    assert header["success"] is True
+    assert header["steps"] == header["total_steps"] == len(steps)
+    assert header["guesses"] == sum(1 for step in steps if step[3] == "guess")
+    assert header["next_offset"] is None
+    assert header["elapsed_us"] == 12500
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+def test_page_header_carries_offset_and_next_page(encoding):
+    steps = [(0, 1, 2, "naked_single"), (4, 4, 9, "hidden_single")]
+    header, decoded = decode_steps(
+        encode_steps(steps, total=60, offset=10, more=True, encoding=encoding)
+    )
+    assert decoded == steps
+    assert (header["offset"], header["next_offset"], header["total_steps"]) == (10, 12, 60)
+
+
+def test_delta_varints_handle_large_jumps_both_ways():
+    # Cell index deltas of +80, -80 and 0 exercise multi-byte zigzag varints
+    steps = [(8, 8, 1, "guess"), (0, 0, 9, "swordfish"), (0, 0, 5, "x_wing"), (8, 8, 3, "naked_pair")]
+    assert decode_steps(encode_steps(steps, encoding="delta"))[1] == steps
+
+
+def test_packed_is_two_bytes_per_step():
+    steps = [(r, r, r + 1, "naked_single") for r in range(9)]
+    assert len(encode_steps(steps)) - len(encode_steps([])) == 2 * len(steps)
+
+
+def test_rejects_foreign_data():
+    with pytest.raises(ValueError):
+        decode_steps(b"JUNK" + bytes(16))
+
+
+def test_accept_header_negotiation():
+    assert accepts_packed("application/json") == (False, "packed")
+    assert accepts_packed(f"text/html, {MEDIA_TYPE}") == (True, "packed")
+    assert accepts_packed(f"{MEDIA_TYPE}; encoding=delta") == (True, "delta")
+    assert accepts_packed(f"{MEDIA_TYPE};encoding=bogus") == (True, "packed")
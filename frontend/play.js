@@ -134,8 +134,54 @@ class PuzzleCache {
   }
 
   async prefetchPuzzles(difficulty, count = 1) {
-    console.log(`🔄 Prefetching ${count} ${difficulty} puzzles...`);
+    return this.prefetchBatch([difficulty], count);
+  }
+
+  // One /api/generate-batch round-trip for several difficulties
+  // (falls back to one /api/generate per puzzle on older backends)
+  async prefetchBatch(difficulties, count = 1) {
+    console.log(`🔄 Prefetching ${count} ${difficulties.join(', ')} puzzles...`);
+
+    try {
+      // Add timeout to prevent hanging on slow APIs
+      const controller = new AbortController();
+      const timeoutId = setTimeout(() => controller.abort(), 10000); // 10 second timeout
+
+      const query = `difficulty=${encodeURIComponent(difficulties.join(','))}&count=${count}`;
+      const res = await fetch(`${API_BASE}/api/generate-batch?${query}`, {
+        signal: controller.signal,
+        cache: 'no-store'
+      });
+
+      clearTimeout(timeoutId);
+
+      if (res.ok) {
+        const data = await res.json();
+        for (const [diff, puzzles] of Object.entries(data.puzzles || {})) {
+          for (const p of puzzles) this.addPuzzle(diff, p.puzzle, p.solution);
+        }
+        return;
+      }
+      if (res.status !== 404) {
+        console.warn(`⚠️ Prefetch failed for ${difficulties.join(', ')}: HTTP ${res.status}`);
+        return;
+      }
+    } catch (e) {
+      // Silently fail - don't break the app if prefetch fails
+      if (e.name === 'AbortError') {
+        console.warn(`⏱️ Prefetch timeout for ${difficulties.join(', ')} puzzles`);
+      } else {
+        console.warn(`⚠️ Failed to prefetch ${difficulties.join(', ')} puzzles:`, e.message);
+      }
+      return;
+    }
 
+    for (const difficulty of difficulties) {
+      await this.prefetchSingly(difficulty, count);
+    }
+  }
+
+  async prefetchSingly(difficulty, count = 1) {
     for (let i = 0; i < count; i++) {
       try {
         // Add timeout to prevent hanging on slow APIs
@@ -172,15 +218,22 @@ class PuzzleCache {
     // This runs in background and doesn't block game startup
     const difficulties = ['easy', 'medium', 'hard', 'expert'];
 
-    // Prefetch one at a time to avoid overwhelming the API
+    // Ask only for what each difficulty is missing (at most 2), with one
+    // batch request per distinct count
+    const byCount = new Map();
     for (const diff of difficulties) {
       const cached = (this.cache.puzzles[diff] || []).length;
-      if (cached < CACHE_SIZE_PER_DIFFICULTY) {
-        // Don't await - let it run in background
-        this.prefetchPuzzles(diff, Math.min(2, CACHE_SIZE_PER_DIFFICULTY - cached))
-          .catch(e => console.warn(`Warmup failed for ${diff}:`, e.message));
+      const missing = Math.min(2, CACHE_SIZE_PER_DIFFICULTY - cached);
+      if (missing > 0) {
+        if (!byCount.has(missing)) byCount.set(missing, []);
+        byCount.get(missing).push(diff);
       }
     }
+    for (const [count, group] of byCount) {
+      // Don't await - let it run in background
+      this.prefetchBatch(group, count)
+        .catch(e => console.warn('Warmup failed:', e.message));
+    }
   }
 
   getStats() {